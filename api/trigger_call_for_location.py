@@ -1,19 +1,26 @@
 import os
 import json
 import sys
+import asyncio
 from supabase import create_client, Client
 import requests
 
 # Add parent directory to path for Vercel deployment
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.voice_agent.trigger_call import trigger_emergency_call
+# The voice agent checks its Vapi/Supabase secrets on import; on Vercel the
+# request is only forwarded to Railway, so it may legitimately be missing
+try:
+    from backend.voice_agent.trigger_call import trigger_emergency_call, drain_background_tasks, close_db_pool, close_http_client
+except (ImportError, RuntimeError) as e:
+    print(f"[DEBUG] Voice agent not available: {e}")
+    trigger_emergency_call = None
 
 url = os.environ.get("SUPABASE_URL")
 key = os.environ.get("SUPABASE_ANON_KEY")
 supabase: Client = create_client(url, key)
 
-def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes: int = 10):
+async def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes: int = 10):
     print(f"[DEBUG] trigger_call_for_location called with location='{location}', disaster_type='{disaster_type}'")
     # Query all users in the given location (address match)
     users = supabase.table("users").select("phone_number, location").execute()
@@ -31,12 +38,25 @@ def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes
         if address and phone_number and address.strip().lower() == location.strip().lower():
             print(f"[DEBUG] MATCH: Calling trigger_emergency_call for {phone_number} at {address}")
             # Call the trigger_emergency_call function
-            result = trigger_emergency_call(
-                phone_number=phone_number,
-                location=address,
-                natural_disaster=disaster_type,
-                timeout_minutes=timeout_minutes
-            )
+            try:
+                result = await trigger_emergency_call(
+                    phone_number=phone_number,
+                    location=address,
+                    natural_disaster=disaster_type,
+                    timeout_minutes=timeout_minutes
+                )
+            except ValueError as e:
+                # Malformed stored number: record it and keep calling everyone else
+                print(f"[DEBUG] Invalid phone number for {address}: {e}")
+                result = {
+                    "status": "error",
+                    "call_id": None,
+                    "send_directions": False,
+                    "contact_emergency_contacts": False,
+                    "google_maps_pin": None,
+                    "error": str(e),
+                    "retryable": False
+                }
             called_users.append({
                 "phone_number": phone_number,
                 "address": address,
@@ -47,6 +67,16 @@ def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes
     print(f"[DEBUG] Called users: {called_users}")
     return {"called_users": called_users, "count": len(called_users)}
 
+async def _run_and_drain(location: str, disaster_type: str):
+    # asyncio.run tears the loop down on return, so let contact alerts finish
+    # first and close the Postgres pool and HTTP client bound to this loop
+    try:
+        return await trigger_call_for_location(location, disaster_type)
+    finally:
+        await drain_background_tasks()
+        await close_db_pool()
+        await close_http_client()
+
 # Vercel handler
 from http.server import BaseHTTPRequestHandler
 
@@ -79,9 +109,11 @@ class handler(BaseHTTPRequestHandler):
                 )
                 print(f"[DEBUG] HTTP POST response: {resp.status_code}, {resp.text}")
                 result = resp.json() if resp.status_code == 200 else {"error": resp.text}
+            elif trigger_emergency_call is None:
+                raise RuntimeError("Voice agent not available for local calls")
             else:
                 print("[DEBUG] Running locally, calling trigger_call_for_location directly")
-                result = trigger_call_for_location(location, disaster_type)
+                result = asyncio.run(_run_and_drain(location, disaster_type))
             print(f"[DEBUG] Final result: {result}")
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
@@ -88,6 +88,8 @@ CREATE TABLE users (
     emergency_contacts JSONB NOT NULL DEFAULT '[]'::jsonb CHECK (
         jsonb_typeof(emergency_contacts) = 'array'
     ),
+    -- Phone numbers from emergency_contacts, kept in sync by trigger
+    emergency_phone_numbers TEXT[] NOT NULL DEFAULT '{}',
     is_active BOOLEAN NOT NULL DEFAULT true,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
@@ -128,6 +130,57 @@ CREATE TRIGGER update_users_updated_at
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Normalize phone numbers to E.164 so lookups can use a single exact match
+CREATE OR REPLACE FUNCTION normalize_phone_number()
+RETURNS TRIGGER AS $$
+DECLARE
+    digits TEXT := regexp_replace(NEW.phone_number, '\D', '', 'g');
+BEGIN
+    IF length(digits) = 10 THEN
+        NEW.phone_number = '+1' || digits;
+    ELSE
+        NEW.phone_number = '+' || digits;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER normalize_users_phone_number
+    BEFORE INSERT OR UPDATE OF phone_number ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION normalize_phone_number();
+
+-- Flatten emergency_contacts into emergency_phone_numbers so alert lookups
+-- read a plain array instead of parsing contact objects
+CREATE OR REPLACE FUNCTION sync_emergency_phone_numbers()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Contacts are either {"phone": ...} objects or bare number strings.
+    -- Numbers are normalized to E.164 the same way as normalize_phone_number
+    -- (ten digits get +1), since SMS sends reject anything else.
+    NEW.emergency_phone_numbers = ARRAY(
+        SELECT CASE WHEN length(digits) = 10 THEN '+1' || digits ELSE '+' || digits END
+        FROM (
+            SELECT regexp_replace(
+                       CASE jsonb_typeof(elem)
+                           WHEN 'string' THEN elem #>> '{}'
+                           ELSE elem->>'phone'
+                       END,
+                       '\D', '', 'g') AS digits
+            FROM jsonb_array_elements(NEW.emergency_contacts) elem
+            WHERE jsonb_typeof(elem) = 'string' OR elem ? 'phone'
+        ) contacts
+        WHERE digits <> ''
+    );
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER sync_users_emergency_phone_numbers
+    BEFORE INSERT OR UPDATE OF emergency_contacts ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_emergency_phone_numbers();
+
 -- Views for common queries
 CREATE VIEW informative_data AS
 SELECT * FROM classified_data 
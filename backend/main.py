@@ -3,10 +3,19 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 
-# Configure logging
+# Configure logging. Records are handed to a queue and written by a
+# background thread, so request handlers never block on stdout.
 logging.basicConfig(level=logging.INFO)
+_root_logger = logging.getLogger()
+_log_queue = queue.SimpleQueue()
+_log_handlers = list(_root_logger.handlers)
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
 # Global variable to store loaded models
@@ -35,8 +44,20 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("🛑 Crisis-MMD Backend shutting down...")
+    await trigger_call_for_location.cancel_running_jobs()
+    try:
+        from voice_agent.trigger_call import drain_background_tasks, close_db_pool, close_http_client
+        await drain_background_tasks()
+        await close_db_pool()
+        await close_http_client()
+    except (ImportError, RuntimeError):
+        pass  # voice agent not installed or not configured
     models.clear()
     logger.info("✅ Cleanup complete")
+    # Log directly again before the listener stops, so nothing logged later in
+    # shutdown lands in a queue no one reads; stop() flushes what's queued
+    _root_logger.handlers = _log_handlers
+    _log_listener.stop()
 
 # Create FastAPI app with lifespan events
 app = FastAPI(
@@ -165,6 +186,8 @@ async def health_check():
             # Emergency endpoints
             "/api/v1/trigger-call-for-location",
             "/api/v1/trigger-call-for-location/health",
+            "/api/v1/trigger-call-for-location/jobs/{job_id}",
+            "/api/v1/vapi/webhook",
             # Config endpoints
             "/api/v1/config/supabase"
         ]
@@ -181,7 +204,7 @@ async def get_supabase_config():
     }
 
 # Include routers
-from routes import process, users, red_zone, crisis_map, orchestrate, classify_crisis, push_classification_db, get_aggregate, trigger_call_for_location
+from routes import process, users, red_zone, crisis_map, orchestrate, classify_crisis, push_classification_db, get_aggregate, trigger_call_for_location, vapi_webhook
 app.include_router(process.router, prefix="/api/v1", tags=["processing"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
 app.include_router(red_zone.router, prefix="/api/v1", tags=["red-zone"])
@@ -191,6 +214,7 @@ app.include_router(classify_crisis.router, prefix="/api/v1", tags=["classificati
 app.include_router(push_classification_db.router, prefix="/api/v1", tags=["classification"])
 app.include_router(get_aggregate.router, prefix="/api/v1", tags=["aggregation"])
 app.include_router(trigger_call_for_location.router, prefix="/api/v1", tags=["emergency"])
+app.include_router(vapi_webhook.router, prefix="/api/v1", tags=["emergency"])
 
 if __name__ == "__main__":
     import os
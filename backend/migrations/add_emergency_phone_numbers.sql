@@ -0,0 +1,49 @@
+-- Add users.emergency_phone_numbers for existing databases.
+-- New databases get the column, function and trigger from database_schema.sql.
+-- Safe to re-run; doing so re-normalizes every stored contact number.
+--
+-- active_users is defined as SELECT * FROM users, which Postgres expands
+-- when the view is created, so it is recreated to pick up the new column.
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS emergency_phone_numbers TEXT[] NOT NULL DEFAULT '{}';
+
+CREATE OR REPLACE FUNCTION sync_emergency_phone_numbers()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Contacts are either {"phone": ...} objects or bare number strings.
+    -- Numbers are normalized to E.164 the same way as normalize_phone_number
+    -- (ten digits get +1), since SMS sends reject anything else.
+    NEW.emergency_phone_numbers = ARRAY(
+        SELECT CASE WHEN length(digits) = 10 THEN '+1' || digits ELSE '+' || digits END
+        FROM (
+            SELECT regexp_replace(
+                       CASE jsonb_typeof(elem)
+                           WHEN 'string' THEN elem #>> '{}'
+                           ELSE elem->>'phone'
+                       END,
+                       '\D', '', 'g') AS digits
+            FROM jsonb_array_elements(NEW.emergency_contacts) elem
+            WHERE jsonb_typeof(elem) = 'string' OR elem ? 'phone'
+        ) contacts
+        WHERE digits <> ''
+    );
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS sync_users_emergency_phone_numbers ON users;
+CREATE TRIGGER sync_users_emergency_phone_numbers
+    BEFORE INSERT OR UPDATE OF emergency_contacts ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_emergency_phone_numbers();
+
+-- Backfill: touching emergency_contacts fires the trigger on every row
+UPDATE users SET emergency_contacts = emergency_contacts;
+
+DROP VIEW IF EXISTS active_users;
+CREATE VIEW active_users AS
+SELECT * FROM users 
+WHERE is_active = true
+ORDER BY created_at DESC;
+
+COMMENT ON VIEW active_users IS 'Quick access to active users who can receive alerts';
@@ -0,0 +1,32 @@
+-- Normalize users.phone_number to E.164 for existing databases.
+-- New databases get the same function and trigger from database_schema.sql.
+--
+-- Run in the Supabase SQL editor. If two rows normalize to the same number
+-- the backfill fails on the UNIQUE constraint; resolve those duplicates first:
+--
+--   SELECT (CASE WHEN length(d) = 10 THEN '+1' ELSE '+' END) || d AS normalized, count(*)
+--   FROM (SELECT regexp_replace(phone_number, '\D', '', 'g') AS d FROM users) s
+--   GROUP BY 1 HAVING count(*) > 1;
+
+CREATE OR REPLACE FUNCTION normalize_phone_number()
+RETURNS TRIGGER AS $$
+DECLARE
+    digits TEXT := regexp_replace(NEW.phone_number, '\D', '', 'g');
+BEGIN
+    IF length(digits) = 10 THEN
+        NEW.phone_number = '+1' || digits;
+    ELSE
+        NEW.phone_number = '+' || digits;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS normalize_users_phone_number ON users;
+CREATE TRIGGER normalize_users_phone_number
+    BEFORE INSERT OR UPDATE OF phone_number ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION normalize_phone_number();
+
+-- Backfill: touching phone_number fires the trigger on every row
+UPDATE users SET phone_number = phone_number;
@@ -26,6 +26,7 @@ async def classify_crisis(request_data: Dict[str, Any]):
     - tweet_text: str
     - image_url: str (optional)
     - image_data: str (optional, base64 encoded)
+    - image_bytes: bytes (optional, raw image uploaded to /orchestrate as multipart)
     - timestamp: str (optional)
     """
     
@@ -43,12 +44,23 @@ async def classify_crisis(request_data: Dict[str, Any]):
         tweet_text = request_data.get('tweet_text', '')
         image_url = request_data.get('image_url', '')
         image_data = request_data.get('image_data', '')
+        image_bytes = request_data.get('image_bytes')
         timestamp = request_data.get('timestamp', None)
         
         image_pil = None
         
+        # Handle uploaded image bytes (no base64 round trip)
+        if image_bytes:
+            try:
+                image_pil = Image.open(io.BytesIO(image_bytes))
+                image_url = ''  # Do not set image_url in output if using binary/base64
+                logger.info("Successfully processed uploaded image data")
+            except Exception as e:
+                logger.error(f"Failed to process image data: {e}")
+                raise HTTPException(status_code=400, detail=f"Invalid image data: {str(e)}")
+
         # Handle image data
-        if image_data:
+        elif image_data:
             try:
                 if image_data.startswith('data:image'):
                     header, b64data = image_data.split(',', 1)
@@ -50,8 +50,30 @@ def trigger_crisis_alert(aggregate_data: Dict[str, Any]) -> bool:
         logger.error(f"Exception triggering crisis alert: {e}")
         return False
 
+async def _read_request_data(request: Request) -> Dict[str, Any]:
+    """
+    Parse the orchestrate body: either JSON, or multipart/form-data with the
+    image sent as a raw 'image_data' file part instead of a base64 data URL.
+    """
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await request.form()
+        request_data = {key: value for key, value in form.items() if isinstance(value, str)}
+        image = form.get("image_data")
+        if image is not None and not isinstance(image, str):
+            request_data.pop("image_data", None)
+            request_data["image_bytes"] = await image.read()
+        return request_data
+
+    try:
+        request_data = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON in request body")
+    if not isinstance(request_data, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    return request_data
+
 @router.post("/orchestrate")
-async def orchestrate_crisis_workflow(request_data: Dict[str, Any]):
+async def orchestrate_crisis_workflow(request: Request):
     """
     Orchestrates the complete crisis detection workflow:
     1. Classify crisis data
@@ -61,6 +83,7 @@ async def orchestrate_crisis_workflow(request_data: Dict[str, Any]):
     """
     
     try:
+        request_data = await _read_request_data(request)
         logger.info("Starting crisis orchestration workflow")
         
         # Step 1: Call classifier directly
@@ -1,8 +1,13 @@
 """Trigger Emergency Calls for Location API route - Triggers emergency calls for users in crisis areas"""
 
 from fastapi import APIRouter, HTTPException
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List
+from datetime import datetime
+from cachetools import TTLCache
+from tenacity import AsyncRetrying, retry_if_result, stop_after_attempt, wait_random_exponential
+import asyncio
 import logging
+import uuid
 from database import get_supabase_client
 import sys
 import os
@@ -15,17 +20,158 @@ logger = logging.getLogger(__name__)
 
 # Import the trigger call function
 try:
-    from voice_agent.trigger_call import trigger_emergency_call
+    from voice_agent.trigger_call import trigger_emergency_call, VAPI_ASSISTANT_ID, VAPI_PHONE_NUMBER_ID
     logger.info("Voice agent imported successfully")
-except ImportError as e:
+except (ImportError, RuntimeError) as e:
     logger.warning(f"Voice agent not available: {e}")
     trigger_emergency_call = None
+    VAPI_ASSISTANT_ID = os.getenv("VAPI_ASSISTANT_ID")
+    VAPI_PHONE_NUMBER_ID = os.getenv("VAPI_PHONE_NUMBER_ID")
 
 router = APIRouter()
 
-def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes: int = 10) -> Dict[str, Any]:
+# How long finished call jobs stay queryable
+JOB_TTL_SECONDS = 6 * 60 * 60
+
+# Retries for calls that fail before Vapi places them (full-jitter exponential backoff)
+CALL_MAX_ATTEMPTS = 3
+CALL_RETRY_MULTIPLIER = 2.0  # seconds
+CALL_RETRY_MAX_WAIT = 30.0
+
+# Background call jobs started by the POST endpoint: job_id -> job state.
+# Bounded and expiring so finished jobs don't pile up in memory.
+_jobs = TTLCache(maxsize=1024, ttl=JOB_TTL_SECONDS)
+# Strong references to running job tasks so they aren't garbage collected
+_job_tasks = set()
+
+def find_users_in_location(location: str) -> List[Dict[str, str]]:
     """
-    Trigger emergency calls for all users in the specified location
+    Find active users whose address matches the crisis location
+    
+    Args:
+        location: Location string to match against user addresses
+        
+    Returns:
+        List of {"phone_number", "address"} dicts for matching users
+    """
+    supabase = get_supabase_client()
+    
+    # Query all users from the database
+    users_result = supabase.table("active_users").select("phone_number, location").execute()
+    logger.info(f"Found {len(users_result.data)} total users in database")
+    
+    matched = []
+    for user in users_result.data:
+        loc = user.get("location", {})
+        
+        # Handle different location formats
+        if isinstance(loc, dict):
+            address = loc.get("address", "")
+        elif isinstance(loc, str):
+            address = loc
+        else:
+            address = ""
+        
+        phone_number = user.get("phone_number", "")
+        
+        logger.debug(f"Checking user: address='{address}', phone_number='{phone_number}'")
+        
+        # Check if user's address matches the crisis location
+        if address and phone_number and address.strip().lower() == location.strip().lower():
+            logger.info(f"MATCH: {phone_number} at {address}")
+            matched.append({"phone_number": phone_number, "address": address})
+        else:
+            logger.debug(f"SKIP: No match for user {phone_number} at {address}")
+    
+    return matched
+
+async def call_user(phone_number: str, address: str, disaster_type: str, timeout_minutes: int) -> Dict[str, Any]:
+    """Place one emergency call, or return a simulated result if the voice agent is unavailable"""
+    # Check if trigger_emergency_call is available and VAPI API key is set
+    vapi_api_key = os.getenv("VAPI_API_KEY")
+    if trigger_emergency_call is None or not vapi_api_key:
+        logger.warning(f"Voice agent not available - trigger_emergency_call: {trigger_emergency_call is not None}, VAPI_API_KEY: {bool(vapi_api_key)}")
+        return {
+            "status": "simulated", 
+            "message": f"Voice agent not available - Missing: {'VAPI_API_KEY' if not vapi_api_key else 'voice agent module'}",
+            "phone_number": phone_number,
+            "location": address,
+            "disaster_type": disaster_type,
+            "would_call": True
+        }
+    
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(CALL_MAX_ATTEMPTS),
+        wait=wait_random_exponential(multiplier=CALL_RETRY_MULTIPLIER, max=CALL_RETRY_MAX_WAIT),
+        retry=retry_if_result(_call_retryable),
+        before_sleep=lambda retry_state: logger.warning(
+            f"Emergency call to {phone_number} failed before it was placed "
+            f"(attempt {retry_state.attempt_number}/{CALL_MAX_ATTEMPTS}), retrying"
+        ),
+        # Out of attempts: hand back the last error result
+        retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+        reraise=True,
+    )
+    
+    try:
+        result = await retrying(_place_call, phone_number, address, disaster_type, timeout_minutes)
+    except ValueError as e:
+        # Malformed phone number; retrying won't fix it
+        logger.error(f"Failed to trigger emergency call for {phone_number}: {e}")
+        return _call_error(str(e))
+    
+    # Check if the call was successful
+    if result.get("status") == "success" and not result.get("error"):
+        logger.info(f"Emergency call triggered successfully for {phone_number}")
+    else:
+        logger.error(f"Emergency call failed for {phone_number}: {result.get('error', 'Unknown error')}")
+    return result
+
+def _call_error(error: str) -> Dict[str, Any]:
+    return {
+        "status": "error",
+        "call_id": None,
+        "send_directions": False,
+        "contact_emergency_contacts": False,
+        "google_maps_pin": None,
+        "error": error,
+        "retryable": False
+    }
+
+def _call_retryable(result: Dict[str, Any]) -> bool:
+    """
+    Retry only failures trigger_emergency_call marks as happening before Vapi
+    dialed. A missing call_id isn't enough: a timed-out or 5xx POST /call may
+    still have placed the call, and redialing someone already reached is worse.
+    """
+    return result.get("status") == "error" and result.get("retryable") is True
+
+async def _place_call(phone_number: str, address: str, disaster_type: str, timeout_minutes: int) -> Dict[str, Any]:
+    """One trigger_emergency_call attempt; unexpected exceptions become an error result"""
+    try:
+        return await trigger_emergency_call(
+            phone_number=phone_number,
+            location=address,
+            natural_disaster=disaster_type,
+            timeout_minutes=timeout_minutes
+        )
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to trigger emergency call for {phone_number}: {e}")
+        return _call_error(str(e))
+
+async def call_users(users: List[Dict[str, str]], disaster_type: str, timeout_minutes: int) -> List[Dict[str, Any]]:
+    """Call every matched user concurrently and pair each with their result"""
+    results = await asyncio.gather(*(
+        call_user(user["phone_number"], user["address"], disaster_type, timeout_minutes)
+        for user in users
+    ))
+    return [{**user, "result": result} for user, result in zip(users, results)]
+
+async def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes: int = 10) -> Dict[str, Any]:
+    """
+    Trigger emergency calls for all users in the specified location and wait for them to finish
     
     Args:
         location: Location string to match against user addresses
@@ -37,85 +183,13 @@ def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes
     """
     logger.info(f"Triggering calls for location='{location}', disaster_type='{disaster_type}'")
     
-    supabase = get_supabase_client()
-    
     try:
-        # Query all users from the database
-        users_result = supabase.table("active_users").select("phone_number, location").execute()
-        logger.info(f"Found {len(users_result.data)} total users in database")
-        
-        if not users_result.data:
+        users = find_users_in_location(location)
+        if not users:
             logger.warning("No users found in database")
             return {"status": "no_users_found", "called_users": [], "count": 0}
         
-        called_users = []
-        
-        for user in users_result.data:
-            loc = user.get("location", {})
-            
-            # Handle different location formats
-            if isinstance(loc, dict):
-                address = loc.get("address", "")
-            elif isinstance(loc, str):
-                address = loc
-            else:
-                address = ""
-            
-            phone_number = user.get("phone_number", "")
-            
-            logger.debug(f"Checking user: address='{address}', phone_number='{phone_number}'")
-            
-            # Check if user's address matches the crisis location
-            if address and phone_number and address.strip().lower() == location.strip().lower():
-                logger.info(f"MATCH: Triggering emergency call for {phone_number} at {address}")
-                
-                # Check if trigger_emergency_call is available and VAPI API key is set
-                vapi_api_key = os.getenv("VAPI_API_KEY")
-                if trigger_emergency_call is None or not vapi_api_key:
-                    logger.warning(f"Voice agent not available - trigger_emergency_call: {trigger_emergency_call is not None}, VAPI_API_KEY: {bool(vapi_api_key)}")
-                    result = {
-                        "status": "simulated", 
-                        "message": f"Voice agent not available - Missing: {'VAPI_API_KEY' if not vapi_api_key else 'voice agent module'}",
-                        "phone_number": phone_number,
-                        "location": address,
-                        "disaster_type": disaster_type,
-                        "would_call": True
-                    }
-                else:
-                    try:
-                        # Call the emergency trigger function
-                        result = trigger_emergency_call(
-                            phone_number=phone_number,
-                            location=address,
-                            natural_disaster=disaster_type,
-                            timeout_minutes=timeout_minutes
-                        )
-                        
-                        # Check if the call was successful
-                        if result.get("status") == "success" and not result.get("error"):
-                            logger.info(f"Emergency call triggered successfully for {phone_number}")
-                        else:
-                            logger.error(f"Emergency call failed for {phone_number}: {result.get('error', 'Unknown error')}")
-                            
-                    except Exception as e:
-                        logger.error(f"Failed to trigger emergency call for {phone_number}: {e}")
-                        result = {
-                            "status": "error",
-                            "call_id": None,
-                            "send_directions": False,
-                            "contact_emergency_contacts": False,
-                            "google_maps_pin": None,
-                            "error": str(e)
-                        }
-                
-                called_users.append({
-                    "phone_number": phone_number,
-                    "address": address,
-                    "result": result
-                })
-            else:
-                logger.debug(f"SKIP: No match for user {phone_number} at {address}")
-        
+        called_users = await call_users(users, disaster_type, timeout_minutes)
         logger.info(f"Emergency call process complete. Called {len(called_users)} users")
         
         return {
@@ -128,10 +202,53 @@ def trigger_call_for_location(location: str, disaster_type: str, timeout_minutes
         logger.error(f"Failed to trigger calls for location: {e}")
         raise
 
+async def _run_job(job_id: str, users: List[Dict[str, str]], disaster_type: str, timeout_minutes: int):
+    """Run a call job in the background and record its outcome"""
+    job = _jobs.get(job_id)
+    if job is not None:
+        job["status"] = "running"
+    try:
+        called_users = await call_users(users, disaster_type, timeout_minutes)
+        outcome = {"status": "completed", "called_users": called_users}
+        logger.info(f"Job {job_id} complete. Called {len(called_users)} users")
+    except asyncio.CancelledError:
+        logger.warning(f"Job {job_id} cancelled before it finished")
+        job = _jobs.get(job_id)
+        if job is not None:
+            job.update(status="cancelled", error="Server shut down before the job finished",
+                       finished_at=datetime.now().isoformat())
+        raise
+    except Exception as e:
+        logger.error(f"Job {job_id} failed: {e}")
+        outcome = {"status": "failed", "error": str(e)}
+    
+    job = _jobs.get(job_id)
+    if job is not None:
+        job.update(outcome, finished_at=datetime.now().isoformat())
+
+async def cancel_running_jobs():
+    """
+    Cancel in-flight call jobs at shutdown, marking each one "cancelled".
+    
+    Jobs live only in this process, so they (and their records) do not
+    survive a restart; this just stops them cleanly and logs what was lost.
+    """
+    tasks = list(_job_tasks)
+    if not tasks:
+        return
+    logger.warning(f"Cancelling {len(tasks)} running call job(s) at shutdown")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
 @router.post("/trigger-call-for-location")
 async def trigger_call_for_location_endpoint(data: Dict[str, Any]):
     """
-    Trigger emergency calls for all users in the affected location
+    Start emergency calls for all users in the affected location
+    
+    Matching users are found up front; the calls themselves run as a
+    background job, so this returns immediately. Poll
+    GET /trigger-call-for-location/jobs/{job_id} for the results.
     
     Expected data structure:
     {
@@ -142,15 +259,15 @@ async def trigger_call_for_location_endpoint(data: Dict[str, Any]):
     
     Returns:
     {
+        "job_id": "string",
         "called_users": [
             {
                 "phone_number": "string",
-                "address": "string", 
-                "result": {...}
+                "address": "string"
             }
         ],
         "count": 0,
-        "status": "string"
+        "status": "pending" | "no_users_found"
     }
     """
     
@@ -176,12 +293,33 @@ async def trigger_call_for_location_endpoint(data: Dict[str, Any]):
         
         logger.info(f"Processing emergency call request for {location}")
         
-        # Trigger the calls
-        result = trigger_call_for_location(location, disaster_type, timeout_minutes)
+        users = find_users_in_location(location)
+        if not users:
+            logger.warning(f"No users found in {location}")
+            return {"job_id": None, "status": "no_users_found", "called_users": [], "count": 0}
         
-        logger.info(f"Emergency call request completed: {result.get('count', 0)} users called")
+        job_id = str(uuid.uuid4())
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "status": "pending",
+            "location": location,
+            "disaster_type": disaster_type,
+            "count": len(users),
+            "called_users": users,
+            "created_at": datetime.now().isoformat(),
+        }
+        task = asyncio.create_task(_run_job(job_id, users, disaster_type, timeout_minutes))
+        _job_tasks.add(task)
+        task.add_done_callback(_job_tasks.discard)
         
-        return result
+        logger.info(f"Emergency call job {job_id} started for {len(users)} users")
+        
+        return {
+            "job_id": job_id,
+            "status": "pending",
+            "called_users": users,
+            "count": len(users)
+        }
         
     except HTTPException:
         raise
@@ -189,6 +327,20 @@ async def trigger_call_for_location_endpoint(data: Dict[str, Any]):
         logger.error(f"Failed to process emergency call request: {e}")
         raise HTTPException(status_code=500, detail=f"Emergency call processing failed: {str(e)}")
 
+@router.get("/trigger-call-for-location/jobs/{job_id}")
+async def get_trigger_call_job(job_id: str):
+    """
+    Get the status of an emergency call job
+    
+    Returns the job with status "pending", "running", "completed",
+    "failed" or "cancelled"; once completed, called_users includes each
+    call's result. Jobs are kept in memory and are lost on restart.
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
 @router.get("/trigger-call-for-location/health")
 async def trigger_call_for_location_health():
     """Health check for trigger call for location endpoint"""
@@ -210,8 +362,8 @@ async def trigger_call_for_location_health():
             "voice_agent_module_available": voice_agent_available,
             "vapi_api_key_configured": vapi_api_key_set,
             "voice_calls_enabled": voice_agent_available and vapi_api_key_set,
-            "assistant_id": "d97df5ae-d4b9-4644-9836-e22a19e0fbea",
-            "phone_number_id": "4107aab6-6685-4a40-9344-586b9490b711",
+            "assistant_id": VAPI_ASSISTANT_ID,
+            "phone_number_id": VAPI_PHONE_NUMBER_ID,
             "supported_fields": ["location", "disaster_type", "timeout_minutes"],
             "location_matching": "exact string match (case insensitive)"
         }
@@ -0,0 +1,55 @@
+"""Vapi Webhook API route - Receives Vapi server events for in-flight emergency calls"""
+
+from fastapi import APIRouter, HTTPException, Request
+from typing import Dict, Any
+import logging
+import sys
+import os
+
+# Add voice_agent module to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Import the server message handler
+try:
+    from voice_agent.trigger_call import handle_server_message
+except (ImportError, RuntimeError) as e:
+    logger.warning(f"Voice agent not available: {e}")
+    handle_server_message = None
+
+router = APIRouter()
+
+# Shared secret Vapi sends in the x-vapi-secret header, if configured
+VAPI_WEBHOOK_SECRET = os.getenv("VAPI_WEBHOOK_SECRET")
+
+@router.post("/vapi/webhook")
+async def vapi_webhook(request: Request) -> Dict[str, Any]:
+    """
+    Receive Vapi server-URL events and hand end-of-call reports to the
+    emergency call waiting on them.
+    
+    Waiters live in the worker process that placed the call. A report that
+    lands on another worker returns resolved=false, and the waiter picks the
+    transcript up from its periodic REST check instead.
+    
+    Returns:
+    {
+        "received": true,
+        "resolved": bool  # whether a pending call picked up the transcript
+    }
+    """
+    if VAPI_WEBHOOK_SECRET and request.headers.get("x-vapi-secret") != VAPI_WEBHOOK_SECRET:
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+    
+    if handle_server_message is None:
+        raise HTTPException(status_code=503, detail="Voice agent not available")
+    
+    payload = await request.json()
+    resolved = handle_server_message(payload)
+    
+    if resolved:
+        logger.info("Delivered end-of-call report from Vapi webhook")
+    
+    return {"received": True, "resolved": resolved}
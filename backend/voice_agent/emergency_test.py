@@ -14,6 +14,10 @@ except Exception as error:
     print(f"Error connecting to Vapi client: {error}")
     raise error
 
+# Call statuses that end the wait loop
+_DONE_STATUSES = frozenset({'completed', 'ended', 'finished'})
+_FAILED_STATUSES = frozenset({'failed', 'error'})
+
 def wait_for_call_completion_and_analyze(call_id: str, timeout_minutes: int = 10):
     """Wait for a call to complete and then analyze the transcript."""
     
@@ -27,26 +31,29 @@ def wait_for_call_completion_and_analyze(call_id: str, timeout_minutes: int = 10
         try:
             call = client.calls.get(call_id)
             
+            status = getattr(call, 'status', None)
+            transcript = getattr(call, 'transcript', None)
+            
             # Check if call is completed
-            if hasattr(call, 'status') and call.status in ['completed', 'ended', 'finished']:
-                print(f"✅ Call completed with status: {call.status}")
+            if status in _DONE_STATUSES:
+                print(f"✅ Call completed with status: {status}")
                 
                 # Check if transcript is available
-                if hasattr(call, 'transcript') and call.transcript:
+                if transcript:
                     print(f"\n📋 Transcript found! Analyzing emergency response...")
                     print("=" * 60)
-                    print_analysis(call.transcript)
+                    print_analysis(transcript)
                     return call
                 else:
                     print("⚠️ Call completed but no transcript available yet. Waiting a bit more...")
                     time.sleep(5)
                     
-            elif hasattr(call, 'status') and call.status in ['failed', 'error']:
-                print(f"❌ Call failed with status: {call.status}")
+            elif status in _FAILED_STATUSES:
+                print(f"❌ Call failed with status: {status}")
                 return call
                 
             else:
-                print(f"📞 Call in progress... Status: {getattr(call, 'status', 'unknown')}")
+                print(f"📞 Call in progress... Status: {status or 'unknown'}")
                 time.sleep(15)  # Check every 15 seconds
                 
         except Exception as e:
@@ -1,214 +1,615 @@
 import os
 import time
-import requests
-import json
+import functools
+import hashlib
+import random
+import asyncio
+import threading
+import httpx
+import orjson
+from cachetools import LRUCache, TTLCache
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from typing import TYPE_CHECKING, Optional, TypedDict
+import logging
+import re
 from dotenv import load_dotenv
 from .analyze_transcript import analyze_transcript, get_google_maps_pin
 
-load_dotenv()
+if TYPE_CHECKING:
+    from supabase import Client
+
+try:
+    from websockets.asyncio.client import connect as ws_connect
+except ImportError:
+    ws_connect = None
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+# Only parse .env when the environment hasn't already been configured
+if not os.environ.get("VAPI_API_KEY"):
+    load_dotenv()
+
+logger = logging.getLogger(__name__)
 
 # Vapi API configuration
 VAPI_API_KEY = os.getenv("VAPI_API_KEY")
 VAPI_BASE_URL = "https://api.vapi.ai"
+VAPI_WS_URL = "wss://api.vapi.ai"
+# Public URL of our /vapi/webhook route; when set, transcripts arrive by webhook
+VAPI_SERVER_URL = os.getenv("VAPI_SERVER_URL")
+# Vapi assistant and outbound number used for emergency calls
+VAPI_ASSISTANT_ID = os.getenv("VAPI_ASSISTANT_ID", "d97df5ae-d4b9-4644-9836-e22a19e0fbea")
+VAPI_PHONE_NUMBER_ID = os.getenv("VAPI_PHONE_NUMBER_ID", "4107aab6-6685-4a40-9344-586b9490b711")
 TEXTBELT_API_KEY = os.getenv("TEXTBELT_API_KEY")
 TEXTBELT_URL = "https://textbelt.com/text"
 
-def make_vapi_request(method, endpoint, data=None):
-    """Make a request to the Vapi API using requests library"""
-    if not VAPI_API_KEY:
-        raise RuntimeError("VAPI_API_KEY environment variable not set")
+# Supabase configuration
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+# Direct Postgres DSN; when set (and asyncpg is installed) contact lookups
+# skip PostgREST. Use the direct or session-pooler connection string.
+SUPABASE_DB_URL = os.getenv("SUPABASE_DB_URL")
+
+def _validate_env():
+    """Fail at import rather than mid-emergency when required config is missing"""
+    missing = [
+        name for name, value in (
+            ("VAPI_API_KEY", VAPI_API_KEY),
+            ("SUPABASE_URL", SUPABASE_URL),
+            ("SUPABASE_ANON_KEY", SUPABASE_ANON_KEY),
+        )
+        if not value
+    ]
+    if missing:
+        raise RuntimeError(f"Missing required environment variables: {', '.join(missing)}")
+
+_validate_env()
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# How much of a failed Vapi response body to keep for logs and errors
+VAPI_ERROR_BODY_LIMIT = 512
+_VAPI_HEADERS = {
+    "Authorization": f"Bearer {VAPI_API_KEY}",
+    "Content-Type": "application/json",
+}
+
+class CallResult(TypedDict):
+    """Result of trigger_emergency_call"""
+    status: str  # "success" | "error"
+    call_id: Optional[str]
+    send_directions: bool
+    contact_emergency_contacts: bool
+    google_maps_pin: Optional[str]
+    error: Optional[str]
+    retryable: bool  # True only when call creation failed before Vapi could dial
+
+# SMS bodies; each is rendered once per call and shared by every recipient
+SHELTER_SMS_TEMPLATE = "🏠 Emergency Shelters: {shelters}"
+CONTACT_ALERT_SMS_TEMPLATE = (
+    "🚨 Emergency Alert: {who} may need assistance due to {disaster} in {location}. "
+    "Please check on them."
+)
+
+# E.164 phone number, with the leading '+' optional
+_E164 = re.compile(r'^\+?[1-9]\d{6,14}$')
+_NONDIGIT = re.compile(r'\D')
+# Separators people actually type; stripping them covers nearly every input
+# without going through the regex engine
+_PHONE_SEPARATORS = str.maketrans('', '', ' ()-.+')
+
+class _LoopLocal:
+    """
+    Lazily create one object per running event loop.
     
-    headers = {
-        "Authorization": f"Bearer {VAPI_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    Pooled connections, locks and futures belong to the loop that first used
+    them. One-shot callers (api/trigger_call_for_location.py, example_usage)
+    run each request under a fresh asyncio.run, so anything kept from the
+    previous, now closed, loop is replaced rather than reused.
+    """
     
+    def __init__(self, factory):
+        self._factory = factory
+        self._loop = None
+        self._value = None
+    
+    def get(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._value = self._factory()
+            self._loop = loop
+        return self._value
+    
+    def pop(self):
+        """Forget and return the running loop's object, or None if it has none"""
+        if self._loop is not asyncio.get_running_loop():
+            return None
+        value, self._value, self._loop = self._value, None, None
+        return value
+
+def _new_http_client():
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        ),
+        timeout=httpx.Timeout(10, connect=3.05),
+    )
+
+# Shared async HTTP client for Vapi and Textbelt so requests reuse TCP/TLS
+# connections and many in-flight calls share one event loop. The transport
+# retries failed connects; _request_with_retry handles retryable status codes.
+_http = _LoopLocal(_new_http_client)
+
+async def close_http_client():
+    """Close the running loop's HTTP client, if it opened one"""
+    client = _http.pop()
+    if client is not None:
+        await client.aclose()
+
+# Retry policy for transient HTTP failures
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_ATTEMPTS = 5
+RETRY_MULTIPLIER = 0.5  # seconds
+RETRY_MAX_WAIT = 30.0
+
+# Contact alert fan-outs still running after trigger_emergency_call returned.
+# Holding a reference keeps them from being garbage collected mid-send and
+# lets shutdown wait for them (see drain_background_tasks).
+_background_tasks = set()
+
+# Calls waiting on a webhook-delivered transcript: call_id -> Future.
+# This is per process, so with several uvicorn workers the webhook can land
+# on a worker with no waiter; waits re-check the call over REST to cover that.
+_pending_transcripts = {}
+
+# How often a webhook wait checks the call over REST in case its
+# end-of-call report was delivered to another worker
+WEBHOOK_BACKSTOP_INTERVAL = 60.0  # seconds
+
+# Call statuses that end the wait loop
+_DONE_STATUSES = frozenset({'completed', 'ended', 'finished'})
+_FAILED_STATUSES = frozenset({'failed', 'error'})
+
+# Call status polling schedule (seconds)
+POLL_BASE_DELAY = 3.0
+POLL_MAX_DELAY = 30.0
+POLL_MULTIPLIER = 1.6
+POLL_JITTER = 0.2
+TRANSCRIPT_BASE_DELAY = 1.0
+TRANSCRIPT_MAX_DELAY = 5.0
+
+# analyze_transcript results keyed by a digest of the transcript, so webhook
+# replays and re-runs of the same call skip the Gemini round-trip
+_analysis_cache = LRUCache(maxsize=256)
+# _analyze_cached runs on worker threads and LRUCache isn't thread-safe
+_analysis_cache_lock = threading.Lock()
+
+# Emergency contacts cache: phone_number -> contacts, bounded and expiring
+_CONTACT_TTL = 300  # seconds
+_contacts_cache = TTLCache(maxsize=2048, ttl=_CONTACT_TTL)
+
+@functools.lru_cache(maxsize=1)
+def _get_supabase() -> "Client":
+    """Return the shared Supabase client, importing and creating it on first use"""
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+
+_CONTACTS_SQL = (
+    "SELECT phone_number, emergency_phone_numbers FROM active_users "
+    "WHERE phone_number = ANY($1::text[])"
+)
+# The asyncpg pool and the lock guarding its creation, per event loop
+_db_state = _LoopLocal(lambda: {"pool": None, "lock": asyncio.Lock()})
+
+async def _get_db_pool():
+    """Return the shared asyncpg pool, or None when lookups should go through PostgREST"""
+    if asyncpg is None or not SUPABASE_DB_URL:
+        return None
+    state = _db_state.get()
+    if state["pool"] is None:
+        async with state["lock"]:
+            if state["pool"] is None:
+                state["pool"] = await asyncpg.create_pool(
+                    dsn=SUPABASE_DB_URL,
+                    min_size=2,
+                    max_size=10,
+                )
+    return state["pool"]
+
+async def close_db_pool():
+    """Close the running loop's asyncpg pool, if one was opened"""
+    state = _db_state.pop()
+    if state is not None and state["pool"] is not None:
+        await state["pool"].close()
+
+_backoff = wait_random_exponential(multiplier=RETRY_MULTIPLIER, max=RETRY_MAX_WAIT)
+
+def _retry_wait(retry_state):
+    """Honor the server's Retry-After header when present, else back off with full jitter"""
+    outcome = retry_state.outcome
+    if outcome is not None and not outcome.failed:
+        retry_after = outcome.result().headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), RETRY_MAX_WAIT)
+            except ValueError:
+                pass  # HTTP-date form; fall back to our own backoff
+    return _backoff(retry_state)
+
+async def _request_with_retry(method, url, **kwargs):
+    """
+    Send a request through the shared client, retrying transient failures with backoff.
+    
+    GETs retry any transport error or RETRY_STATUSES response. Other methods
+    (the Textbelt POST) only retry failures that happen before the server
+    could act: connect errors and 429. A read timeout or 5xx may come after
+    the SMS went out, and replaying it would send a duplicate.
+    """
+    if method.upper() == "GET":
+        retry = (
+            retry_if_result(lambda resp: resp.status_code in RETRY_STATUSES)
+            | retry_if_exception_type(httpx.TransportError)
+        )
+    else:
+        retry = (
+            retry_if_result(lambda resp: resp.status_code == 429)
+            | retry_if_exception_type((httpx.ConnectError, httpx.ConnectTimeout))
+        )
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(MAX_ATTEMPTS),
+        wait=_retry_wait,
+        retry=retry,
+        # Once attempts run out, hand back the last response (or re-raise the
+        # last transport error) so callers see the real failure
+        retry_error_callback=lambda retry_state: retry_state.outcome.result(),
+    )
+    return await retrying(_http.get().request, method, url, **kwargs)
+
+class VapiError(Exception):
+    """Non-2xx response from the Vapi API"""
+    
+    def __init__(self, status_code: int, body: str):
+        super().__init__(f"Vapi API error - HTTP {status_code}: {body or 'No response body'}")
+        self.status_code = status_code
+        self.body = body
+
+async def make_vapi_request(method, endpoint, data=None):
+    """Make a request to the Vapi API through the shared async client"""
     url = f"{VAPI_BASE_URL}{endpoint}"
     
     try:
         if method.upper() == "POST":
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            # Never replay call creation; a retried POST could place a second call
+            response = await _http.get().post(url, headers=_VAPI_HEADERS, content=orjson.dumps(data), timeout=30)
         elif method.upper() == "GET":
-            response = requests.get(url, headers=headers, timeout=30)
+            response = await _request_with_retry("GET", url, headers=_VAPI_HEADERS, timeout=30)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
-        
-        # Log response details for debugging
-        print(f"📡 Vapi API Response: {response.status_code}")
-        if response.status_code >= 400:
-            print(f"📡 Error Response Body: {response.text}")
-        
-        response.raise_for_status()
-        return response.json()
-        
-    except requests.exceptions.HTTPError as e:
-        error_details = f"HTTP {response.status_code}: {response.text if response else 'No response body'}"
-        raise Exception(f"Vapi API error - {error_details}") from e
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         raise Exception(f"Request failed: {str(e)}") from e
+    
+    logger.debug("Vapi %s %s -> %s", method.upper(), endpoint, response.status_code)
+    if response.status_code >= 400:
+        # Only decode the body on failure, and only enough of it to diagnose
+        body = response.content[:VAPI_ERROR_BODY_LIMIT].decode("utf-8", "replace")
+        logger.debug("Vapi error response body: %s", body)
+        raise VapiError(response.status_code, body)
+    
+    return orjson.loads(response.content)
 
-# Dummy function to get emergency contacts from Supabase
-def get_emergency_contacts(phone_number):
-    """Get emergency contacts for a user from Supabase"""
-    try:
-        print(f"📱 Looking up emergency contacts for {phone_number}")
-        from supabase import create_client, Client
-        url = os.environ.get("SUPABASE_URL")
-        key = os.environ.get("SUPABASE_ANON_KEY")
-        supabase: Client = create_client(url, key)
-        
-        # First, let's see what users actually exist in the database
-        print(f"📱 DEBUG: Checking all users in active_users table...")
-        all_users = supabase.table("active_users").select("phone_number, id, name").execute()
-        print(f"📱 DEBUG: Found {len(all_users.data)} total users:")
-        for user in all_users.data[:5]:  # Show first 5 users
-            print(f"📱 DEBUG: User - Phone: {user.get('phone_number')}, Name: {user.get('name')}")
-        
-        # Try multiple phone number formats to find the user
-        phone_formats = [
-            phone_number,                          # Original format: +16692209078
-            phone_number.replace('+1', '+'),       # Remove country code: +6692209078  
-            phone_number.replace('+', ''),         # No plus: 16692209078
-            phone_number.replace('+1', ''),        # No country code or plus: 6692209078
-            '+1' + phone_number.replace('+', '').replace('1', '', 1) if phone_number.startswith('+1') else '+1' + phone_number.replace('+', ''),  # Ensure +1 prefix
-        ]
-        
-        # Remove duplicates while preserving order
-        phone_formats = list(dict.fromkeys(phone_formats))
-        print(f"📱 DEBUG: Will try these phone formats: {phone_formats}")
-        
-        resp = None
-        for phone_format in phone_formats:
-            print(f"📱 Trying phone format: '{phone_format}'")
-            resp = supabase.table("active_users").select("emergency_contacts, phone_number, name").eq("phone_number", phone_format).execute()
-            print(f"📱 Query result for '{phone_format}': {len(resp.data)} users found")
-            if resp.data:
-                print(f"📱 ✅ Found user with phone format: '{phone_format}' - User: {resp.data[0].get('name')}")
-                break
+def _analyze_cached(transcript: str) -> dict:
+    """analyze_transcript, memoized on the transcript's blake2b digest"""
+    key = hashlib.blake2b(transcript.encode(), digest_size=16).digest()
+    with _analysis_cache_lock:
+        analysis = _analysis_cache.get(key)
+    if analysis is None:
+        analysis = analyze_transcript(transcript)
+        # An unparseable model reply is worth retrying, so don't pin it
+        if analysis.get("shelter_locations") or analysis.get("wants_emergency_contacts") is not None:
+            with _analysis_cache_lock:
+                _analysis_cache[key] = analysis
+    return analysis
+
+def _to_e164(phone_number: str) -> str:
+    """
+    Normalize a phone number to the E.164 form stored in active_users.
+    
+    Ten-digit numbers are assumed to be US numbers and get a +1 prefix.
+    """
+    digits = phone_number.translate(_PHONE_SEPARATORS)
+    if not (digits.isascii() and digits.isdigit()):
+        digits = _NONDIGIT.sub('', digits)
+    if len(digits) == 10:
+        return '+1' + digits
+    return '+' + digits
+
+class ContactsBatcher:
+    """
+    Coalesce concurrent emergency contact lookups into one Supabase query.
+    
+    Lookups that arrive within max_queue_time of each other (up to
+    max_batch_size of them) are resolved together by a single query, with
+    at most `concurrency` queries in flight at once. The query goes straight
+    to Postgres when SUPABASE_DB_URL is configured, otherwise through
+    PostgREST with `.in_("phone_number", ...)`.
+    """
+    
+    def __init__(self, max_batch_size=200, max_queue_time=0.025, concurrency=4):
+        self.max_batch_size = max_batch_size
+        self.max_queue_time = max_queue_time
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending = []
+        self._flush_handle = None
+        self._tasks = set()
+    
+    async def process(self, phone_number):
+        """Queue a lookup and wait for its batch to be resolved"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((phone_number, future))
         
-        if not resp or not resp.data:
-            print(f"📱 ❌ No user found with any phone format.")
-            print(f"📱 ❌ Searched for: {phone_formats}")
-            print(f"📱 ❌ Available phone numbers in DB: {[u.get('phone_number') for u in all_users.data[:10]]}")
-            return []
-            
-        print(f"📱 Supabase response: {resp.data}")
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_queue_time, self._flush)
         
-        if resp.data and len(resp.data) > 0:
-            user_data = resp.data[0]
-            emergency_contacts = user_data.get("emergency_contacts")
-            print(f"📱 Raw emergency_contacts data: {emergency_contacts}")
-            
-            if emergency_contacts:
-                if isinstance(emergency_contacts, list):
-                    # Handle list of dicts with 'phone' keys
-                    phone_numbers = []
-                    for contact in emergency_contacts:
-                        if isinstance(contact, dict) and "phone" in contact:
-                            phone_numbers.append(contact["phone"])
-                        elif isinstance(contact, str):
-                            # Handle direct phone number strings
-                            phone_numbers.append(contact)
-                    print(f"📱 Extracted phone numbers: {phone_numbers}")
-                    return phone_numbers
+        return await future
+    
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch):
+        async with self._semaphore:
+            try:
+                phone_numbers = [phone for phone, _ in batch]
+                pool = await _get_db_pool()
+                if pool is not None:
+                    results = await self.process_batch_pg(pool, phone_numbers)
                 else:
-                    print(f"📱 emergency_contacts is not a list: {type(emergency_contacts)}")
-            else:
-                print(f"📱 No emergency_contacts field found or it's empty")
-        else:
-            print(f"📱 No user found with phone number {phone_number}")
+                    results = await asyncio.to_thread(self.process_batch, phone_numbers)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+        
+        for (_, future), contacts in zip(batch, results):
+            if not future.done():
+                future.set_result(contacts)
+    
+    def process_batch(self, phone_numbers):
+        """
+        Look up emergency contacts for a batch of users in one query.
+        
+        Returns:
+            list: One entry per input phone number, aligned with the input:
+                the user's contact numbers, or None if no user was found
+        """
+        supabase = _get_supabase()
+        
+        # Stored numbers are normalized to E.164, so one exact match per user suffices
+        lookup_numbers = [_to_e164(phone) for phone in phone_numbers]
+        logger.debug("Looking up emergency contacts for %d users: %s", len(lookup_numbers), lookup_numbers)
+        
+        resp = supabase.table("active_users").select("phone_number, emergency_phone_numbers").in_("phone_number", list(set(lookup_numbers))).execute()
+        users_by_phone = {user.get("phone_number"): user for user in resp.data}
+        logger.debug("Contacts query matched %d users", len(resp.data))
+        
+        results = self._match(lookup_numbers, users_by_phone)
+        if None in results and logger.isEnabledFor(logging.DEBUG):
+            # Show a few stored numbers to help spot formatting mismatches
+            sample = supabase.table("active_users").select("phone_number").limit(5).execute()
+            logger.debug("Sample stored phone numbers: %s", [u.get("phone_number") for u in sample.data])
+        return results
+    
+    async def process_batch_pg(self, pool, phone_numbers):
+        """Same as process_batch, but queries Postgres directly over the asyncpg pool"""
+        lookup_numbers = [_to_e164(phone) for phone in phone_numbers]
+        logger.debug("Looking up emergency contacts for %d users via Postgres", len(lookup_numbers))
+        
+        rows = await pool.fetch(_CONTACTS_SQL, list(set(lookup_numbers)))
+        users_by_phone = {row["phone_number"]: dict(row) for row in rows}
+        logger.debug("Contacts query matched %d users", len(rows))
+        return self._match(lookup_numbers, users_by_phone)
+    
+    @staticmethod
+    def _match(lookup_numbers, users_by_phone):
+        """Align query results with the requested numbers"""
+        results = []
+        for lookup_number in lookup_numbers:
+            user_data = users_by_phone.get(lookup_number)
+            if user_data is None:
+                logger.info("No active user found with phone number %s", lookup_number)
+                results.append(None)
+                continue
             
-    except Exception as e:
-        print(f"📱 Error getting emergency contacts: {e}")
-        import traceback
-        traceback.print_exc()
+            # Maintained from emergency_contacts by a database trigger, which
+            # normalizes to E.164; normalize again for rows synced before it did
+            contact_numbers = [_to_e164(number) for number in user_data.get("emergency_phone_numbers") or []]
+            logger.debug("Emergency contact numbers for %s: %s", lookup_number, contact_numbers)
+            results.append(contact_numbers)
+        
+        return results
+
+# Pending lookups and the query semaphore are loop-bound, so one batcher per loop
+_contacts_batcher = _LoopLocal(ContactsBatcher)
+
+async def get_emergency_contacts(phone_number):
+    """Get emergency contacts for a user from Supabase"""
+    phone_number = _to_e164(phone_number)
+    cached = _contacts_cache.get(phone_number)
+    if cached is not None:
+        logger.debug("Using cached emergency contacts for %s", phone_number)
+        return cached
+    
+    try:
+        contacts = await _contacts_batcher.get().process(phone_number)
+    except Exception:
+        logger.exception("Error getting emergency contacts for %s", phone_number)
+        return []
+    
+    if contacts is None:
+        return []
     
-    return []
+    _contacts_cache[phone_number] = contacts
+    return contacts
 
 def get_user_name(phone_number):
     """Get user's name from Supabase active_users table"""
     try:
-        print(f"📱 Looking up user name for {phone_number}")
-        from supabase import create_client, Client
-        url = os.environ.get("SUPABASE_URL")
-        key = os.environ.get("SUPABASE_ANON_KEY")
-        supabase: Client = create_client(url, key)
-        
-        # Try multiple phone number formats to find the user
-        phone_formats = [
-            phone_number,                          # Original format: +16692209078
-            phone_number.replace('+1', '+'),       # Remove country code: +6692209078  
-            phone_number.replace('+', ''),         # No plus: 16692209078
-            phone_number.replace('+1', ''),        # No country code or plus: 6692209078
-            '+1' + phone_number.replace('+', '').replace('1', '', 1) if phone_number.startswith('+1') else '+1' + phone_number.replace('+', ''),  # Ensure +1 prefix
-        ]
-        
-        # Remove duplicates while preserving order
-        phone_formats = list(dict.fromkeys(phone_formats))
-        print(f"📱 DEBUG: Will try these phone formats for name lookup: {phone_formats}")
-        
-        resp = None
-        for phone_format in phone_formats:
-            print(f"📱 Trying phone format for name: '{phone_format}'")
-            resp = supabase.table("active_users").select("name, phone_number").eq("phone_number", phone_format).execute()
-            print(f"📱 Name query result for '{phone_format}': {len(resp.data)} users found")
-            if resp.data:
-                user_name = resp.data[0].get('name')
-                print(f"📱 ✅ Found user name: '{user_name}' for phone format: '{phone_format}'")
-                return user_name
-        
-        print(f"📱 ❌ No user name found for {phone_number}")
+        logger.debug("Looking up user name for %s", phone_number)
+        supabase = _get_supabase()
+        
+        resp = supabase.table("active_users").select("name").eq("phone_number", _to_e164(phone_number)).limit(1).execute()
+        if resp.data:
+            user_name = resp.data[0].get('name')
+            logger.debug("Found user name %r for %s", user_name, phone_number)
+            return user_name
+        
+        logger.info("No user name found for %s", phone_number)
         return None
             
-    except Exception as e:
-        print(f"📱 Error getting user name: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Error getting user name for %s", phone_number)
     
     return None
 
-def send_sms(phone, message):
+async def send_sms(phone, message):
     """Send SMS using TextBelt API"""
+    # Catch malformed numbers (e.g. mis-stored contacts) before spending a Textbelt credit
+    if not _E164.match(phone):
+        logger.warning("Invalid phone number for SMS: %r", phone)
+        return {"success": False, "error": f"invalid phone {phone!r}"}
+    if not phone.startswith('+'):
+        phone = '+' + phone
+    
     try:
-        print(f"📱 Attempting to send SMS to {phone}")
-        print(f"📱 Message: {message}")
+        logger.info("Sending SMS to %s", phone)
+        logger.debug("SMS message: %s", message)
         
         # Check if TextBelt API key is available
         if not TEXTBELT_API_KEY:
-            print(f"❌ TEXTBELT_API_KEY environment variable not set")
+            logger.error("TEXTBELT_API_KEY environment variable not set")
             return {"success": False, "error": "TEXTBELT_API_KEY not configured"}
         
-        print(f"📱 Using TextBelt API key: {TEXTBELT_API_KEY[:10]}...")
-        
-        resp = requests.post(
+        resp = await _request_with_retry(
+            "POST",
             TEXTBELT_URL,
-            data={
+            content=orjson.dumps({
                 'phone': phone,
                 'message': message,
                 'key': TEXTBELT_API_KEY
-            },
-            timeout=10
+            }),
+            headers=_JSON_HEADERS
         )
         
-        print(f"📱 TextBelt response status: {resp.status_code}")
-        print(f"📱 TextBelt response: {resp.text}")
+        logger.debug("TextBelt response %s: %s", resp.status_code, resp.text)
         
-        result = resp.json()
+        result = orjson.loads(resp.content)
         
         if result.get("success"):
-            print(f"✅ SMS sent successfully to {phone}")
+            logger.info("SMS sent successfully to %s", phone)
         else:
-            print(f"❌ SMS failed to {phone}: {result}")
+            logger.warning("SMS failed to %s: %s", phone, result)
             
         return result
         
     except Exception as e:
-        print(f"❌ Error sending SMS to {phone}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error sending SMS to %s", phone)
         return {"success": False, "error": str(e)}
 
-def trigger_emergency_call(phone_number: str, location: str, natural_disaster: str, timeout_minutes: int = 10) -> dict:
+async def _broadcast_sms(recipients, message):
+    """
+    Send one pre-rendered message to every distinct recipient concurrently.
+    
+    Textbelt has no bulk endpoint, so this fans out one request per number.
+    
+    Returns:
+        dict: recipient -> send_sms result (or the exception it raised)
+    """
+    recipients = list(dict.fromkeys(recipients))
+    results = await asyncio.gather(
+        *(send_sms(recipient, message) for recipient in recipients),
+        return_exceptions=True,
+    )
+    return dict(zip(recipients, results))
+
+def _spawn_background(coro):
+    """Run a coroutine as a tracked background task"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+async def drain_background_tasks(timeout: float = 30.0):
+    """
+    Wait for in-flight contact alerts to finish.
+    
+    Call this before the event loop shuts down (app shutdown, or before
+    asyncio.run returns in a one-shot handler) so queued SMS aren't dropped.
+    """
+    if not _background_tasks:
+        return
+    logger.info("Waiting for %d background SMS task(s) to finish", len(_background_tasks))
+    _, pending = await asyncio.wait(set(_background_tasks), timeout=timeout)
+    if pending:
+        logger.warning("Cancelling %d background SMS task(s) still running after %ss", len(pending), timeout)
+        for task in pending:
+            task.cancel()
+
+async def _notify_emergency_contacts(phone_number, contact_lookup, natural_disaster, location):
+    """Look up the user's emergency contacts and send each of them an alert"""
+    try:
+        emergency_contacts, user_name = await contact_lookup
+        logger.debug("Found %d emergency contacts: %s", len(emergency_contacts), emergency_contacts)
+        
+        if not emergency_contacts:
+            logger.info("No emergency contacts found for %s", phone_number)
+            return
+        
+        # Simple emergency alert without URLs, using user's name when we have it
+        contact_msg = CONTACT_ALERT_SMS_TEMPLATE.format(
+            who=user_name or phone_number,
+            disaster=natural_disaster,
+            location=location,
+        )
+        contact_results = await _broadcast_sms(emergency_contacts, contact_msg)
+        for recipient, sms_result in contact_results.items():
+            logger.debug("SMS result for %s: %s", recipient, sms_result)
+    except Exception as e:
+        logger.error("Failed to notify emergency contacts of %s: %s", phone_number, e)
+
+def _failed_before_dialing(error: Exception) -> bool:
+    """
+    True if a POST /call failure means Vapi never created the call.
+    
+    Connect errors never reached Vapi, and 4xx responses (429 included) are
+    rejections before anything was dialed. Read timeouts and 5xx responses
+    may come after the call was created, so they are not safe to retry.
+    """
+    if isinstance(error, VapiError):
+        return 400 <= error.status_code < 500
+    return isinstance(error.__cause__, (httpx.ConnectError, httpx.ConnectTimeout))
+
+async def trigger_emergency_call(phone_number: str, location: str, natural_disaster: str, timeout_minutes: int = 10) -> CallResult:
     """
     Trigger an emergency call and return user preferences and shelter location.
     
@@ -219,22 +620,15 @@ def trigger_emergency_call(phone_number: str, location: str, natural_disaster: s
         timeout_minutes (int): How long to wait for call completion (default: 10 minutes)
     
     Returns:
-        dict: Call result with status, preferences, and shelter information
-        {
-            "status": "success" | "error",
-            "call_id": str | None,
-            "send_directions": bool,
-            "contact_emergency_contacts": bool,
-            "google_maps_pin": str | None,
-            "error": str | None
-        }
-    """
+        CallResult: Call status, the user's preferences, and shelter information
     
-    # Configuration
-    assistant_id = "d97df5ae-d4b9-4644-9836-e22a19e0fbea"
-    phone_number_id = "4107aab6-6685-4a40-9344-586b9490b711"
+    Raises:
+        ValueError: If phone_number is not a valid E.164 number
+    """
     
-    # Validate phone number format
+    # Validate phone number format before spending a Vapi call on it
+    if not _E164.match(phone_number):
+        raise ValueError(f"invalid phone {phone_number!r}")
     if not phone_number.startswith('+'):
         phone_number = '+' + phone_number
     
@@ -244,14 +638,14 @@ def trigger_emergency_call(phone_number: str, location: str, natural_disaster: s
         "location": location
     }
     
-    print(f"🚨 Triggering emergency call for {natural_disaster} in {location}")
-    print(f"📞 Calling: {phone_number}")
+    logger.info("Triggering emergency call for %s in %s, calling %s", natural_disaster, location, phone_number)
     
+    call_id = None
     try:
         # Create the call using REST API
         call_data = {
-            "assistantId": assistant_id,
-            "phoneNumberId": phone_number_id,
+            "assistantId": VAPI_ASSISTANT_ID,
+            "phoneNumberId": VAPI_PHONE_NUMBER_ID,
             "customer": {
                 "number": phone_number
             },
@@ -259,82 +653,90 @@ def trigger_emergency_call(phone_number: str, location: str, natural_disaster: s
                 "variableValues": emergency_variables
             }
         }
+        if VAPI_SERVER_URL:
+            # Have Vapi post call events (including the end-of-call report) back to us
+            call_data["assistantOverrides"]["server"] = {"url": VAPI_SERVER_URL}
         
-        print(f"📞 Making Vapi call with data: {json.dumps(call_data, indent=2)}")
-        call_response = make_vapi_request("POST", "/call", call_data)
+        logger.debug("Making Vapi call with data: %s", call_data)
+        call_response = await make_vapi_request("POST", "/call", call_data)
         call_id = call_response.get("id")
         
         if not call_id:
             raise Exception("Failed to get call ID from Vapi response")
         
-        print(f"✅ Call initiated: {call_id}")
-        print(f"⏳ Waiting for call completion (timeout: {timeout_minutes} minutes)...")
+        logger.info("Call initiated id=%s, waiting up to %s minutes for completion", call_id, timeout_minutes)
         
         # Wait for call completion and get transcript
-        transcript = _wait_for_transcript(call_id, timeout_minutes)
+        transcript = await _await_transcript(call_id, timeout_minutes)
         
         if not transcript:
-            print("❌ No transcript available - returning default values")
+            logger.warning("No transcript available for call %s - returning default values", call_id)
             return {
                 "status": "success",
                 "call_id": call_id,
                 "send_directions": False,
                 "contact_emergency_contacts": False,
                 "google_maps_pin": None,
-                "error": "No transcript available"
+                "error": "No transcript available",
+                "retryable": False
             }
         
         # Analyze transcript
-        print("📋 Analyzing transcript...")
-        analysis = analyze_transcript(transcript)
+        logger.debug("Analyzing transcript for call %s", call_id)
+        # The Gemini call is blocking; keep it off the loop shared by other calls and the webhook
+        analysis = await asyncio.to_thread(_analyze_cached, transcript)
         
         # Extract boolean results
         shelter_locations = analysis.get('shelter_locations', [])
         send_directions = bool(shelter_locations)
         contact_emergency = analysis.get('wants_emergency_contacts') is True
         
+        # Nothing to send - skip the Supabase lookups and SMS work entirely
+        if not send_directions and not contact_emergency:
+            logger.info("Call %s: no shelter directions or contact alerts requested", call_id)
+            return {
+                "status": "success",
+                "call_id": call_id,
+                "send_directions": False,
+                "contact_emergency_contacts": False,
+                "google_maps_pin": None,
+                "error": None,
+                "retryable": False
+            }
+        
         # Generate Google Maps pin for first shelter (for backward compatibility)
         shelter_location = shelter_locations[0] if shelter_locations else None
         google_maps_pin = get_google_maps_pin(shelter_location) if shelter_location else None
         
-        print(f"📊 Results:")
-        print(f"   Send Directions: {send_directions}")
-        print(f"   Contact Emergency Contacts: {contact_emergency}")
-        print(f"   Shelter Locations from transcript: {shelter_locations}")
+        # The contact list and the user's name are independent Supabase
+        # lookups, so start both now and let them overlap
+        if contact_emergency:
+            contact_lookup = asyncio.gather(
+                get_emergency_contacts(phone_number),
+                asyncio.to_thread(get_user_name, phone_number),
+            )
         
-        if shelter_locations:
-            # Send SMS to user with all shelter names from transcript (no URLs)
-            if len(shelter_locations) == 1:
-                shelter_text = shelter_locations[0]
-            elif len(shelter_locations) <= 3:
-                shelter_text = ", ".join(shelter_locations)
-            else:
-                # Limit to first 3 shelters
-                shelter_text = ", ".join(shelter_locations[:3])
-            
-            print(f"   Sending shelter info: {shelter_text}")
-            send_sms(phone_number, f"🏠 Emergency Shelters: {shelter_text}")
+        logger.info(
+            "Call %s results: send_directions=%s contact_emergency_contacts=%s shelters=%s",
+            call_id, send_directions, contact_emergency, shelter_locations,
+        )
         
+        # Contact alerts are lower priority than the user's own directions,
+        # so they run in the background instead of holding up the caller
         if contact_emergency:
-            print(f"📱 User wants emergency contacts notified - fetching contacts...")
-            # Get emergency contacts from Supabase
-            emergency_contacts = get_emergency_contacts(phone_number)
-            print(f"📱 Found {len(emergency_contacts)} emergency contacts: {emergency_contacts}")
-            
-            if emergency_contacts:
-                # Get user's name for the emergency alert message
-                user_name = get_user_name(phone_number)
-                contact_identifier = user_name if user_name else phone_number
-                
-                for contact in emergency_contacts:
-                    print(f"📱 Sending SMS to emergency contact: {contact}")
-                    # Send simple emergency alert without URLs, using user's name
-                    sms_result = send_sms(contact, f"🚨 Emergency Alert: {contact_identifier} may need assistance due to {natural_disaster} in {location}. Please check on them.")
-                    print(f"📱 SMS result for {contact}: {sms_result}")
-            else:
-                print(f"📱 No emergency contacts found for {phone_number}")
+            logger.debug("User wants emergency contacts notified - alerting in background")
+            _spawn_background(
+                _notify_emergency_contacts(phone_number, contact_lookup, natural_disaster, location)
+            )
         else:
-            print(f"📱 User does not want emergency contacts notified")
+            logger.debug("User does not want emergency contacts notified")
+        
+        if shelter_locations:
+            # Send SMS to user with up to 3 shelter names from transcript (no URLs)
+            shelter_text = ", ".join(shelter_locations[:3])
+            logger.debug("Sending shelter info: %s", shelter_text)
+            sms_result = await send_sms(phone_number, SHELTER_SMS_TEMPLATE.format(shelters=shelter_text))
+            logger.debug("SMS result for %s: %s", phone_number, sms_result)
         
         return {
             "status": "success",
@@ -342,21 +744,27 @@ def trigger_emergency_call(phone_number: str, location: str, natural_disaster: s
             "send_directions": send_directions,
             "contact_emergency_contacts": contact_emergency,
             "google_maps_pin": google_maps_pin,
-            "error": None
+            "error": None,
+            "retryable": False
         }
         
     except Exception as error:
-        print(f"❌ Error during emergency call: {error}")
+        logger.error("Error during emergency call: %s", error)
         return {
             "status": "error",
-            "call_id": None,
+            "call_id": call_id,  # set when the call was placed before the failure
             "send_directions": False,
             "contact_emergency_contacts": False,
             "google_maps_pin": None,
-            "error": str(error)
+            "error": str(error),
+            "retryable": call_id is None and _failed_before_dialing(error)
         }
 
-def _wait_for_transcript(call_id: str, timeout_minutes: int) -> str:
+def _jittered(delay: float) -> float:
+    """Spread a backoff delay by ±POLL_JITTER so concurrent calls don't poll in lockstep"""
+    return delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+async def _wait_for_transcript(call_id: str, timeout_minutes: int) -> str:
     """
     Wait for call completion and return transcript.
     
@@ -368,52 +776,198 @@ def _wait_for_transcript(call_id: str, timeout_minutes: int) -> str:
         str: The call transcript, or None if not available
     """
     
-    timeout_seconds = timeout_minutes * 60
-    start_time = time.time()
+    deadline = time.monotonic() + timeout_minutes * 60
     
-    while time.time() - start_time < timeout_seconds:
+    # Back off while the call is in progress, but poll tightly once it has
+    # ended since the transcript usually lands within a second or two
+    delay = POLL_BASE_DELAY
+    transcript_delay = TRANSCRIPT_BASE_DELAY
+    previous_status = None
+    
+    async def _sleep(seconds):
+        await asyncio.sleep(max(0, min(seconds, deadline - time.monotonic())))
+    
+    while time.monotonic() < deadline:
         try:
-            call_response = make_vapi_request("GET", f"/call/{call_id}")
+            call_response = await make_vapi_request("GET", f"/call/{call_id}")
             status = call_response.get("status")
             
+            if status != previous_status:
+                delay = POLL_BASE_DELAY
+                previous_status = status
+            
             # Check if call is completed
-            if status in ['completed', 'ended', 'finished']:
-                print(f"✅ Call completed with status: {status}")
+            if status in _DONE_STATUSES:
+                logger.debug("Call %s completed with status %s", call_id, status)
                 
                 # Check if transcript is available
                 transcript = call_response.get("transcript")
                 if transcript:
                     return transcript
                 else:
-                    print("⚠️ Call completed but transcript not ready yet, waiting...")
-                    time.sleep(5)
+                    logger.debug("Call %s completed but transcript not ready yet", call_id)
+                    await _sleep(_jittered(transcript_delay))
+                    transcript_delay = min(TRANSCRIPT_MAX_DELAY, transcript_delay * POLL_MULTIPLIER)
                     
-            elif status in ['failed', 'error']:
-                print(f"❌ Call failed with status: {status}")
+            elif status in _FAILED_STATUSES:
+                logger.warning("Call %s failed with status %s", call_id, status)
                 return None
                 
             else:
-                print(f"📞 Call in progress... Status: {status or 'unknown'}")
-                time.sleep(15)  # Check every 15 seconds
+                logger.debug("Call %s in progress, status=%s", call_id, status)
+                await _sleep(_jittered(delay))
+                delay = min(POLL_MAX_DELAY, delay * POLL_MULTIPLIER)
                 
         except Exception as e:
-            print(f"Error checking call status: {e}")
-            time.sleep(15)
+            logger.warning("Error checking status of call %s: %s", call_id, e)
+            await _sleep(_jittered(delay))
+            delay = min(POLL_MAX_DELAY, delay * POLL_MULTIPLIER)
     
-    print(f"⏰ Timeout reached ({timeout_minutes} minutes)")
-    
-    # One final check for transcript
+    logger.warning("Timed out after %s minutes waiting for call %s", timeout_minutes, call_id)
+    return await _final_transcript_check(call_id)
+
+async def _final_transcript_check(call_id: str) -> str:
+    """Fetch the call once more and return its transcript if it has one"""
     try:
-        call_response = make_vapi_request("GET", f"/call/{call_id}")
+        call_response = await make_vapi_request("GET", f"/call/{call_id}")
         transcript = call_response.get("transcript")
         if transcript:
-            print("📋 Found transcript on final check!")
+            logger.info("Found transcript for call %s on final check", call_id)
             return transcript
     except Exception as e:
-        print(f"Final transcript check failed: {e}")
+        logger.warning("Final transcript check for call %s failed: %s", call_id, e)
     
     return None
 
+def _end_of_call_report(event: dict) -> dict:
+    """Return the end-of-call report in a Vapi event, or None for other events"""
+    message = event.get("message", event)
+    if message.get("type") == "end-of-call-report":
+        return message
+    return None
+
+def _report_transcript(report: dict) -> str:
+    return report.get("transcript") or (report.get("artifact") or {}).get("transcript")
+
+async def _read_end_of_call_report(ws) -> str:
+    """Read Vapi call events until the end-of-call report arrives"""
+    async for raw in ws:
+        report = _end_of_call_report(orjson.loads(raw))
+        if report is not None:
+            return _report_transcript(report)
+    return None
+
+def handle_server_message(payload: dict) -> bool:
+    """
+    Deliver a Vapi server-URL webhook payload to the call waiting on it.
+    
+    Args:
+        payload (dict): JSON body Vapi posted to the server URL
+        
+    Returns:
+        bool: True if the payload completed a pending transcript wait
+    """
+    report = _end_of_call_report(payload)
+    if report is None:
+        return False
+    
+    call_id = (report.get("call") or {}).get("id")
+    future = _pending_transcripts.get(call_id)
+    if future is None:
+        return False
+    
+    transcript = _report_transcript(report)
+    
+    def _resolve():
+        if not future.done():
+            future.set_result(transcript)
+    
+    future.get_loop().call_soon_threadsafe(_resolve)
+    return True
+
+async def _await_webhook_transcript(call_id: str, timeout_minutes: int) -> str:
+    """Wait for handle_server_message to deliver the call's end-of-call report"""
+    future = asyncio.get_running_loop().create_future()
+    _pending_transcripts[call_id] = future
+    deadline = time.monotonic() + timeout_minutes * 60
+    transcript = None
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Timed out after %s minutes waiting for call %s", timeout_minutes, call_id)
+                break
+            try:
+                transcript = await asyncio.wait_for(asyncio.shield(future), min(remaining, WEBHOOK_BACKSTOP_INTERVAL))
+                break
+            except asyncio.TimeoutError:
+                pass
+            
+            # No report yet; it may have gone to another worker, so ask Vapi
+            try:
+                call_response = await make_vapi_request("GET", f"/call/{call_id}")
+            except Exception as e:
+                logger.warning("Error checking status of call %s: %s", call_id, e)
+                continue
+            status = call_response.get("status")
+            if status in _FAILED_STATUSES:
+                logger.warning("Call %s failed with status %s", call_id, status)
+                return None
+            if status in _DONE_STATUSES and call_response.get("transcript"):
+                logger.info("Call %s ended without its webhook reaching this process", call_id)
+                return call_response["transcript"]
+    finally:
+        _pending_transcripts.pop(call_id, None)
+    
+    if transcript:
+        return transcript
+    
+    # One fallback GET in case the webhook was missed or arrived without a transcript
+    return await _final_transcript_check(call_id)
+
+async def _await_transcript(call_id: str, timeout_minutes: int) -> str:
+    """
+    Wait for call completion and return transcript.
+    
+    When VAPI_SERVER_URL is configured, Vapi posts the end-of-call report to
+    our webhook and this just waits for it. Otherwise it listens on the Vapi
+    call event stream, falling back to polling when the stream can't be
+    opened or closes without an end-of-call report.
+    
+    Args:
+        call_id (str): The call ID to monitor
+        timeout_minutes (int): Timeout in minutes
+        
+    Returns:
+        str: The call transcript, or None if not available
+    """
+    if VAPI_SERVER_URL:
+        return await _await_webhook_transcript(call_id, timeout_minutes)
+    
+    deadline = time.monotonic() + timeout_minutes * 60
+    
+    if ws_connect is not None:
+        try:
+            ws = await ws_connect(
+                f"{VAPI_WS_URL}/call/{call_id}/events",
+                additional_headers={"Authorization": f"Bearer {VAPI_API_KEY}"},
+            )
+        except Exception as e:
+            logger.info("Vapi event stream unavailable (%s), falling back to polling", e)
+        else:
+            async with ws:
+                try:
+                    transcript = await asyncio.wait_for(_read_end_of_call_report(ws), timeout_minutes * 60)
+                except asyncio.TimeoutError:
+                    logger.warning("Timed out after %s minutes waiting for call %s", timeout_minutes, call_id)
+                    return await _final_transcript_check(call_id)
+            if transcript:
+                return transcript
+            logger.info("Vapi event stream closed without a transcript, falling back to polling")
+    
+    remaining_minutes = max(0, deadline - time.monotonic()) / 60
+    return await _wait_for_transcript(call_id, remaining_minutes)
+
 
 
 # Example usage function
@@ -459,13 +1013,23 @@ def example_usage():
         print("❌ Cancelled")
         return
     
+    async def _run():
+        try:
+            return await trigger_emergency_call(
+                phone_number=phone_number,
+                location=location,
+                natural_disaster=natural_disaster,
+                timeout_minutes=15
+            )
+        except ValueError as e:
+            return {"status": "error", "call_id": None, "error": str(e)}
+        finally:
+            await drain_background_tasks()
+            await close_db_pool()
+            await close_http_client()
+    
     # Trigger the call
-    result = trigger_emergency_call(
-        phone_number=phone_number,
-        location=location,
-        natural_disaster=natural_disaster,
-        timeout_minutes=15
-    )
+    result = asyncio.run(_run())
     
     print(f"\n📊 Final Results:")
     print(f"   🟢 Status: {result.get('status')}")
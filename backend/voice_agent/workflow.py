@@ -1,18 +1,25 @@
 import os
-from vapi import Vapi
+import functools
 from dotenv import load_dotenv
 
-load_dotenv()
+# Only parse .env when the environment hasn't already been configured
+if not os.environ.get("VAPI_API_KEY"):
+    load_dotenv()
 
-# Initialize the Vapi client
-try:
-    client = Vapi(token=os.getenv("VAPI_API_KEY"))
-    print("Successfully connected to Vapi client")
-        
-except Exception as error:
-    print(f"Error connecting to Vapi client: {error}")
-    print("Please check your VAPI_API_KEY in the .env file")
-    raise error
+VAPI_API_KEY = os.getenv("VAPI_API_KEY")
+
+@functools.lru_cache(maxsize=1)
+def _get_vapi():
+    """Return the shared Vapi client, importing and creating it on first use"""
+    from vapi import Vapi
+    try:
+        client = Vapi(token=VAPI_API_KEY)
+        print("Successfully connected to Vapi client")
+    except Exception as error:
+        print(f"Error connecting to Vapi client: {error}")
+        print("Please check your VAPI_API_KEY in the .env file")
+        raise error
+    return client
 
 def make_outbound_call(customer_phone_number: str, assistant_id: str, phone_number_id: str, variable_values: dict = None) -> dict:
     """
@@ -44,7 +51,7 @@ def make_outbound_call(customer_phone_number: str, assistant_id: str, phone_numb
             }
         
         # Create the call
-        call = client.calls.create(**call_params)
+        call = _get_vapi().calls.create(**call_params)
         
         print(f"Outbound call initiated: {call.id}")
         return call
@@ -56,7 +63,7 @@ def make_outbound_call(customer_phone_number: str, assistant_id: str, phone_numb
 def list_assistants():
     """List all available assistants."""
     try:
-        assistants = client.assistants.list()
+        assistants = _get_vapi().assistants.list()
         print("Available assistants:")
         for assistant in assistants:
             print(f"ID: {assistant.id}, Name: {assistant.name if hasattr(assistant, 'name') else 'No name'}")
@@ -68,7 +75,7 @@ def list_assistants():
 def list_phone_numbers():
     """List all available phone numbers."""
     try:
-        phone_numbers = client.phone_numbers.list()
+        phone_numbers = _get_vapi().phone_numbers.list()
         print("Available phone numbers:")
         for phone in phone_numbers:
             print(f"ID: {phone.id}, Number: {phone.number}")
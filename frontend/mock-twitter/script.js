@@ -173,29 +173,22 @@ class MockTwitterApp {
                 location: location || null
             };
             
-            // Create server post object (combining text and location)
+            // Create server post (combining text and location)
             let combinedText = text;
             if (location) {
                 combinedText = text + ' ' + location;
             }
-            const serverPost = {
-                image: null,
-                timestamp: post.timestamp,
-                text: combinedText
-            };
-            // Handle image if present
+            const serverPost = new FormData();
+            serverPost.append('text', combinedText);
+            serverPost.append('timestamp', post.timestamp);
+            // Send the image file as-is; the server stores it and keeps only its URL
             if (this.currentImageFile) {
-                const imageBase64 = await this.convertImageToBase64(this.currentImageFile);
-                post.image = imageBase64;
-                serverPost.image = imageBase64;
+                serverPost.append('image', this.currentImageFile);
             }
             // Save post to database (with combined text+location)
             await fetch('http://localhost:8000/save-post', {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(serverPost)
+                body: serverPost
             });
             
             // Refresh posts from database to show the new post
@@ -215,15 +208,6 @@ class MockTwitterApp {
         }
     }
 
-    convertImageToBase64(file) {
-        return new Promise((resolve, reject) => {
-            const reader = new FileReader();
-            reader.onload = () => resolve(reader.result);
-            reader.onerror = reject;
-            reader.readAsDataURL(file);
-        });
-    }
-
     resetComposer() {
         document.getElementById('post-text').value = '';
         document.getElementById('location-select').value = '';
@@ -368,7 +352,7 @@ class MockTwitterApp {
             const result = await response.json();
             
             if (result.status === 'success') {
-                console.log(`✅ Loaded ${result.total_count} posts from ${result.source}`);
+                console.log(`✅ Loaded ${result.posts.length} of ${result.total_count} posts from ${result.source}`);
                 
                 // Clear existing posts
                 this.posts = [];
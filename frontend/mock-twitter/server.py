@@ -1,7 +1,19 @@
-from http.server import HTTPServer, SimpleHTTPRequestHandler
-import json
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from cachetools import TTLCache
+from fastapi.staticfiles import StaticFiles
+import asyncio
+import base64
+import binascii
+import mimetypes
+import orjson
 import os
+import re
 import sys
+import threading
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 # Simple fallback configuration for when backend config is not available
 class SimpleSettings:
@@ -16,7 +28,7 @@ sys.path.insert(0, backend_path)  # Insert at beginning to prioritize our config
 try:
     # Try to import supabase first
     from supabase import create_client
-    
+
     # Try to import our backend config
     try:
         import config
@@ -26,7 +38,7 @@ try:
         print(f"⚠️  Backend config not available: {backend_import_error}")
         print("   Using simple environment-based config")
         settings = SimpleSettings()
-    
+
     SUPABASE_AVAILABLE = True
     print("✅ Supabase integration available")
 except ImportError as e:
@@ -36,291 +48,420 @@ except ImportError as e:
     print("   Falling back to JSON-only storage")
     settings = SimpleSettings()
 
-class PostsHandler(SimpleHTTPRequestHandler):
-    def __init__(self, *args, **kwargs):
-        # Initialize Supabase client if available
-        self.supabase_client = None
-        if SUPABASE_AVAILABLE and settings and hasattr(settings, 'supabase_url') and hasattr(settings, 'supabase_service_key'):
-            if settings.supabase_url and settings.supabase_service_key:
-                try:
-                    # Use minimal options to avoid compatibility issues
-                    self.supabase_client = create_client(
-                        settings.supabase_url, 
-                        settings.supabase_service_key
-                    )
-                    print("✅ Supabase client initialized in server")
-                except Exception as e:
-                    print(f"⚠️  Failed to initialize Supabase client: {e}")
-                    self.supabase_client = None
-        
-        super().__init__(*args, **kwargs)
-
-    def end_headers(self):
-        # Add CORS headers
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        SimpleHTTPRequestHandler.end_headers(self)
-
-    def do_OPTIONS(self):
-        # Handle preflight requests
-        self.send_response(200)
-        self.end_headers()
-
-    def do_GET(self):
-        if self.path == '/':
-            # Serve the main HTML file
-            self.path = '/index.html'
-            return SimpleHTTPRequestHandler.do_GET(self)
-        elif self.path == '/get-posts':
-            # Fetch posts from database
-            self._handle_get_posts()
-            return
-        else:
-            return SimpleHTTPRequestHandler.do_GET(self)
+STATIC_DIR = os.path.dirname(os.path.abspath(__file__))
+# Supabase Storage bucket (public) holding uploaded post images; rows keep only the URL
+IMAGE_BUCKET = 'tweet-images'
+_DATA_URL = re.compile(r'^data:(?P<content_type>[\w.+-]+/[\w.+-]+);base64,')
 
-    def _handle_get_posts(self):
-        """Handle GET request for fetching posts from database"""
-        try:
-            # Try to get posts from Supabase first
-            posts_from_db = self._get_posts_from_supabase()
-            
-            # If Supabase fails, fall back to local JSON
-            if not posts_from_db:
-                posts_from_db = self._get_posts_from_json()
-            
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                'status': 'success',
-                'posts': posts_from_db,
-                'total_count': len(posts_from_db),
-                'source': 'supabase' if self.supabase_client and posts_from_db else 'local_json'
-            }
-            
-            self.wfile.write(json.dumps(response).encode())
-            
-        except Exception as e:
-            print(f"❌ Error fetching posts: {e}")
-            self.send_response(500)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            error_response = {
-                'status': 'error',
-                'message': 'Failed to fetch posts',
-                'posts': [],
-                'total_count': 0
-            }
-            
-            self.wfile.write(json.dumps(error_response).encode())
-
-    def _get_posts_from_supabase(self):
-        """Fetch posts from Supabase database"""
-        if not self.supabase_client:
-            print("⚠️  Supabase client not available for fetching posts")
-            return []
-        
-        try:
-            # Fetch all posts ordered by timestamp (newest first)
-            response = self.supabase_client.table('mock_twitter_posts').select('*').order('timestamp', desc=True).execute()
-            
-            if response.data:
-                print(f"✅ Fetched {len(response.data)} posts from Supabase")
-                # Convert database format to frontend format
-                posts = []
-                for db_post in response.data:
-                    post = {
-                        'text': db_post.get('text', ''),
-                        'image': db_post.get('image'),
-                        'timestamp': db_post.get('timestamp', ''),
-                        'location': None  # Extract location from text if needed
-                    }
-                    posts.append(post)
-                return posts
-            else:
-                print("📭 No posts found in Supabase")
-                return []
-                
-        except Exception as e:
-            print(f"❌ Failed to fetch from Supabase: {e}")
-            return []
+# /get-posts page size
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# Encoded /get-posts pages are reused for up to GET_CACHE_TTL seconds, or
+# until the next save bumps _posts_version
+GET_CACHE_TTL = 1.0
+_posts_version = 0
+_get_cache = TTLCache(maxsize=128, ttl=GET_CACHE_TTL)  # (limit, offset) -> (version, body)
 
-    def _get_posts_from_json(self):
-        """Fetch posts from local JSON file (fallback)"""
-        try:
-            posts_file = 'posts.json'
-            if os.path.exists(posts_file):
-                with open(posts_file, 'r') as f:
-                    all_posts = json.load(f)
-                
-                posts = all_posts.get('posts', [])
-                # Sort by timestamp (newest first)
-                posts.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-                print(f"✅ Fetched {len(posts)} posts from local JSON")
-                return posts
-            else:
-                print("📭 No local JSON file found")
-                return []
-                
-        except Exception as e:
-            print(f"❌ Failed to fetch from JSON: {e}")
-            return []
-
-    def do_POST(self):
-        if self.path == '/save-post':
-            content_length = int(self.headers['Content-Length'])
-            post_data = json.loads(self.rfile.read(content_length))
-            
-            # Enhanced storage: Save to Supabase first, then local JSON as backup
-            success_supabase = self._save_to_supabase(post_data)
-            success_json = self._save_to_json(post_data)
-            
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                'status': 'success',
-                'storage': {
-                    'supabase': success_supabase,
-                    'local_json': success_json
-                },
-                'message': self._get_storage_message(success_supabase, success_json)
-            }
-            
-            self.wfile.write(json.dumps(response).encode())
-            return
-
-        return SimpleHTTPRequestHandler.do_POST(self)
-    
-    def _save_to_supabase(self, post_data):
-        """Save post to Supabase database"""
-        if not self.supabase_client:
-            print("⚠️  Supabase client not available, skipping database save")
-            return False
-        
+# Local backup store: one JSON post per line, appended on every save
+POSTS_FILE = os.path.join(STATIC_DIR, 'posts.jsonl')
+# Older servers kept every post in a single JSON document; migrated on startup
+LEGACY_POSTS_FILE = os.path.join(STATIC_DIR, 'posts.json')
+
+# Posts arriving within INSERT_MAX_DELAY of each other are written to
+# Supabase in one insert of up to INSERT_MAX_BATCH rows
+INSERT_MAX_BATCH = 64
+INSERT_MAX_DELAY = 0.01  # seconds
+_insert_queue = asyncio.Queue()
+
+# Shared Supabase client, created once at startup so every request reuses
+# its HTTP connection pool instead of paying for a new client and TLS handshake
+supabase_client = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global supabase_client
+    await asyncio.to_thread(_migrate_legacy_posts)
+    await asyncio.to_thread(_load_posts_from_json)
+    supabase_client = await asyncio.to_thread(_create_supabase_client)
+    if supabase_client:
         try:
-            # Prepare data for Supabase
-            db_record = {
-                'text': post_data.get('text', ''),
-                'image': post_data.get('image'),  # Can be None
-                'timestamp': post_data.get('timestamp', datetime.now().isoformat())
-            }
-            
-            # Insert into mock_twitter_posts table
-            response = self.supabase_client.table('mock_twitter_posts').insert(db_record).execute()
-            
-            if response.data:
-                print(f"✅ Post saved to Supabase: ID {response.data[0].get('id', 'unknown')}")
-                return True
-            else:
-                print("⚠️  Supabase insert returned no data")
-                return False
-                
+            # Test connection by trying to access the table
+            await asyncio.to_thread(
+                lambda: supabase_client.table('mock_twitter_posts').select('id').limit(1).execute()
+            )
+            print("✅ Supabase connection tested successfully")
         except Exception as e:
-            print(f"❌ Failed to save to Supabase: {e}")
-            return False
-    
-    def _save_to_json(self, post_data):
-        """Save post to local JSON file (backup storage)"""
+            print(f"⚠️  Supabase connection test failed: {e}")
+            print("   Posts will be saved to JSON only")
+
+    insert_worker = asyncio.create_task(_insert_worker())
+    yield
+    insert_worker.cancel()
+
+app = FastAPI(title="Mock Twitter", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# CORS for the page and any local tooling posting to us
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type"],
+)
+
+def _create_supabase_client():
+    """Create a Supabase client if Supabase is installed and configured"""
+    if SUPABASE_AVAILABLE and settings and hasattr(settings, 'supabase_url') and hasattr(settings, 'supabase_service_key'):
+        if settings.supabase_url and settings.supabase_service_key:
+            try:
+                # Use minimal options to avoid compatibility issues
+                client = create_client(
+                    settings.supabase_url,
+                    settings.supabase_service_key
+                )
+                print("✅ Supabase client initialized in server")
+                return client
+            except Exception as e:
+                print(f"⚠️  Failed to initialize Supabase client: {e}")
+    return None
+
+@app.get("/get-posts")
+async def get_posts(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    """Handle GET request for fetching a page of posts (newest first) from database"""
+    version = _posts_version
+    etag = f'W/"{version}"'
+    cached = _get_cache.get((limit, offset))
+    if cached and cached[0] == version:
+        # Nothing saved since this page was encoded; polls that already have it get no body
+        if request.headers.get('if-none-match') == etag:
+            return Response(status_code=304, headers={'ETag': etag})
+        return Response(cached[1], media_type='application/json', headers={'ETag': etag})
+
+    try:
+        # The Supabase client and file I/O are blocking, so run them off the
+        # event loop and let concurrent requests overlap their waits.
+        # Try to get posts from Supabase first
+        page = await asyncio.to_thread(_get_posts_from_supabase, supabase_client, limit, offset)
+        source = 'supabase'
+
+        # If Supabase is unavailable or fails, fall back to local JSON;
+        # an empty page from Supabase is a real answer and is returned as is
+        if page is None:
+            page = await asyncio.to_thread(_get_posts_from_json, limit, offset)
+            source = 'local_json'
+        posts, total_count = page
+
+        body = orjson.dumps({
+            'status': 'success',
+            'posts': posts,
+            'total_count': total_count,  # All stored posts, not just this page
+            'source': source
+        })
+        _get_cache[(limit, offset)] = (version, body)
+        return Response(body, media_type='application/json', headers={'ETag': etag})
+
+    except Exception as e:
+        print(f"❌ Error fetching posts: {e}")
+        return ORJSONResponse(status_code=500, content={
+            'status': 'error',
+            'message': 'Failed to fetch posts',
+            'posts': [],
+            'total_count': 0
+        })
+
+def _get_posts_from_supabase(supabase_client, limit=DEFAULT_PAGE_SIZE, offset=0):
+    """Fetch (page of posts, total post count) from Supabase, or None if it is unavailable or fails"""
+    if not supabase_client:
+        print("⚠️  Supabase client not available for fetching posts")
+        return None
+
+    try:
+        # Fetch one page of posts ordered by timestamp (newest first)
+        response = (
+            supabase_client.table('mock_twitter_posts')
+            .select('id, text, image, timestamp', count='exact')
+            .order('timestamp', desc=True)
+            .range(offset, offset + limit - 1)
+            .execute()
+        )
+
+        if response.data:
+            print(f"✅ Fetched {len(response.data)} posts from Supabase")
+            return _convert_db_posts(response.data), response.count
+        else:
+            print("📭 No posts found in Supabase")
+            return [], response.count
+
+    except Exception as e:
+        print(f"❌ Failed to fetch from Supabase: {e}")
+        return None
+
+def _load_posts_from_json():
+    """Read posts.jsonl once at startup into the in-memory _posts list"""
+    try:
+        if os.path.exists(POSTS_FILE):
+            with open(POSTS_FILE, 'rb') as f:
+                posts = [orjson.loads(line) for line in f if line.strip()]
+            with _json_lock:
+                _posts[:] = posts
+            print(f"✅ Loaded {len(posts)} posts from local JSON")
+        else:
+            print("📭 No local JSON file found")
+
+    except Exception as e:
+        print(f"❌ Failed to load from JSON: {e}")
+
+def _convert_db_posts(db_rows: list[dict]) -> list[dict]:
+    """Convert database rows to the frontend post format"""
+    return [
+        {
+            'text': db_post.get('text', ''),
+            'image': db_post.get('image'),
+            'timestamp': db_post.get('timestamp', ''),
+            'location': None  # Extract location from text if needed
+        }
+        for db_post in db_rows
+    ]
+
+def _get_posts_from_json(limit=DEFAULT_PAGE_SIZE, offset=0):
+    """Fetch (page of posts, total post count) from the in-memory copy of the local JSON backup (fallback)"""
+    with _json_lock:
+        # Posts are kept in arrival order, so walking backwards is newest first
+        total_count = len(_posts)
+        end = total_count - offset
+        posts = _posts[max(end - limit, 0):max(end, 0)][::-1]
+
+    if posts:
+        print(f"✅ Fetched {len(posts)} posts from local JSON")
+    else:
+        print("📭 No posts in local JSON")
+    return posts, total_count
+
+def _migrate_legacy_posts():
+    """Convert an existing posts.json into posts.jsonl, once"""
+    if os.path.exists(POSTS_FILE) or not os.path.exists(LEGACY_POSTS_FILE):
+        return
+
+    try:
+        with open(LEGACY_POSTS_FILE, 'rb') as f:
+            legacy_posts = orjson.loads(f.read()).get('posts', [])
+
+        tmp_file = POSTS_FILE + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            for post in legacy_posts:
+                f.write(orjson.dumps(post) + b'\n')
+        os.replace(tmp_file, POSTS_FILE)
+
+        # Keep the original around rather than deleting user data
+        os.replace(LEGACY_POSTS_FILE, LEGACY_POSTS_FILE + '.migrated')
+        print(f"✅ Migrated {len(legacy_posts)} posts from {LEGACY_POSTS_FILE} to {POSTS_FILE}")
+    except Exception as e:
+        print(f"⚠️  Could not migrate {LEGACY_POSTS_FILE}: {e}")
+
+def _upload_image(data, content_type):
+    """Upload image bytes to Supabase Storage and return its public URL, or None"""
+    if not supabase_client:
+        return None
+
+    path = f"{uuid.uuid4().hex}{mimetypes.guess_extension(content_type) or ''}"
+    try:
+        bucket = supabase_client.storage.from_(IMAGE_BUCKET)
+        bucket.upload(path, data, {'content-type': content_type})
+        print(f"✅ Image uploaded to Supabase Storage: {path}")
+        return bucket.get_public_url(path)
+    except Exception as e:
+        print(f"❌ Failed to upload image: {e}")
+        return None
+
+async def _read_post(request):
+    """
+    Parse a /save-post body into post_data with 'image' as a URL where possible.
+
+    Accepts multipart/form-data (text, timestamp, image file) or the older
+    JSON body, whose base64 data: URL images are uploaded once here.
+    """
+    content_type = request.headers.get('content-type', '')
+
+    if content_type.startswith('multipart/form-data'):
+        form = await request.form()
+        post_data = {'text': form.get('text', '')}
+        if form.get('timestamp'):
+            post_data['timestamp'] = form.get('timestamp')
+
+        image = form.get('image')
+        if image is not None and hasattr(image, 'read'):
+            image_type = image.content_type or 'application/octet-stream'
+            data = await image.read()
+            url = await asyncio.to_thread(_upload_image, data, image_type)
+            # Without Storage, keep the image inline so it isn't lost
+            post_data['image'] = url or f"data:{image_type};base64,{base64.b64encode(data).decode()}"
+        else:
+            post_data['image'] = None
+        return _check_post(post_data)
+
+    try:
+        post_data = orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        raise HTTPException(status_code=400, detail='Request body is not valid JSON')
+    if not isinstance(post_data, dict):
+        raise HTTPException(status_code=400, detail='Request body must be a JSON object')
+    image = post_data.get('image')
+    match = _DATA_URL.match(image) if isinstance(image, str) else None
+    if match:
         try:
-            # Initialize or load the posts file
-            posts_file = 'posts.json'
-            if os.path.exists(posts_file):
-                with open(posts_file, 'r') as f:
-                    all_posts = json.load(f)
-            else:
-                all_posts = {
-                    'metadata': {
-                        'total_posts': 0,
-                        'last_updated': None
-                    },
-                    'posts': []
-                }
-            
-            # Add the new post
-            all_posts['posts'].append(post_data)
-            all_posts['metadata']['total_posts'] = len(all_posts['posts'])
-            all_posts['metadata']['last_updated'] = datetime.now().isoformat()
-            
-            # Save back to file
-            with open(posts_file, 'w') as f:
-                json.dump(all_posts, f, indent=2)
-            
-            print("✅ Post saved to local JSON file")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Failed to save to JSON: {e}")
-            return False
-    
-    def _get_storage_message(self, supabase_success, json_success):
-        """Generate appropriate message based on storage results"""
-        if supabase_success and json_success:
-            return "Post saved to both Supabase and local JSON"
-        elif supabase_success:
-            return "Post saved to Supabase (local JSON failed)"
-        elif json_success:
-            return "Post saved to local JSON only (Supabase unavailable)"
+            data = base64.b64decode(image[match.end():], validate=True)
+        except binascii.Error:
+            raise HTTPException(status_code=400, detail='Image data URL is not valid base64')
+        url = await asyncio.to_thread(_upload_image, data, match['content_type'])
+        if url:
+            post_data['image'] = url
+    return _check_post(post_data)
+
+def _check_post(post_data):
+    """Trim the post text and reject posts with neither text nor an image"""
+    text = post_data.get('text')
+    post_data['text'] = text.strip() if isinstance(text, str) else ''
+    if not post_data['text'] and not post_data.get('image'):
+        raise HTTPException(status_code=400, detail='Post needs text or an image')
+    return post_data
+
+@app.post("/save-post")
+async def save_post(request: Request):
+    post_data = await _read_post(request)
+
+    # Enhanced storage: Save to Supabase first, then local JSON as backup
+    success_supabase = await _save_to_supabase(post_data)
+    success_json = await asyncio.to_thread(_save_to_json, post_data)
+    if success_supabase or success_json:
+        # Invalidate cached /get-posts pages and their ETags
+        global _posts_version
+        _posts_version += 1
+
+    return {
+        'status': 'success',
+        'storage': {
+            'supabase': success_supabase,
+            'local_json': success_json
+        },
+        'message': _get_storage_message(success_supabase, success_json)
+    }
+
+async def _save_to_supabase(post_data):
+    """Queue a post for the next batched Supabase insert and wait for the result"""
+    if not supabase_client:
+        print("⚠️  Supabase client not available, skipping database save")
+        return False
+
+    # mock_twitter_posts requires non-empty text; one such row would fail its whole batch
+    if not post_data.get('text'):
+        print("⚠️  Image-only post, keeping it in local JSON only")
+        return False
+
+    # Prepare data for Supabase
+    db_record = {
+        'text': post_data.get('text', ''),
+        'image': post_data.get('image'),  # Can be None
+        'timestamp': post_data.get('timestamp', datetime.now().isoformat())
+    }
+
+    future = asyncio.get_running_loop().create_future()
+    await _insert_queue.put((db_record, future))
+    return await future
+
+async def _insert_worker():
+    """Drain the insert queue, writing each batch of posts with a single insert"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _insert_queue.get()]
+        deadline = loop.time() + INSERT_MAX_DELAY
+        while len(batch) < INSERT_MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_insert_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        records = [record for record, _ in batch]
+        if await asyncio.to_thread(_insert_posts, records):
+            print(f"✅ {len(records)} post(s) saved to Supabase")
+            results = [True] * len(batch)
+        elif len(records) > 1:
+            # One bad row fails the whole insert; retry one by one so the rest still land
+            results = await asyncio.to_thread(lambda: [_insert_posts([record]) for record in records])
+            print(f"✅ {sum(results)} of {len(records)} post(s) saved to Supabase individually")
         else:
-            return "Failed to save post to any storage"
+            results = [False]
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+def _insert_posts(records):
+    """Insert rows into mock_twitter_posts in one request; False if it fails"""
+    try:
+        # return=minimal so PostgREST doesn't echo the rows (and their images) back to us
+        supabase_client.table('mock_twitter_posts').insert(records, returning='minimal').execute()
+        return True
+    except Exception as e:
+        print(f"❌ Failed to save to Supabase: {e}")
+        return False
+
+# Saves run in worker threads; keep each appended line whole and _posts in step with the file
+_json_lock = threading.Lock()
+# Every post in posts.jsonl, oldest first; reads are served from here rather than re-parsing the file
+_posts = []
+
+def _save_to_json(post_data):
+    """Append post to local JSON Lines file (backup storage)"""
+    try:
+        line = orjson.dumps(post_data) + b'\n'
+        with _json_lock:
+            with open(POSTS_FILE, 'ab') as f:
+                f.write(line)
+            _posts.append(post_data)
+
+        print("✅ Post saved to local JSON file")
+        return True
+
+    except Exception as e:
+        print(f"❌ Failed to save to JSON: {e}")
+        return False
+
+def _get_storage_message(supabase_success, json_success):
+    """Generate appropriate message based on storage results"""
+    if supabase_success and json_success:
+        return "Post saved to both Supabase and local JSON"
+    elif supabase_success:
+        return "Post saved to Supabase (local JSON failed)"
+    elif json_success:
+        return "Post saved to local JSON only (Supabase unavailable)"
+    else:
+        return "Failed to save post to any storage"
+
+# Serve index.html, script.js and styles.css; mounted last so the API routes win
+app.mount("/", StaticFiles(directory=STATIC_DIR, html=True), name="static")
 
 if __name__ == '__main__':
+    import uvicorn
+
     # Change to the directory containing this script
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))
-    
+    os.chdir(STATIC_DIR)
+
     print("\n🚨 Mock Twitter Server with Supabase Integration")
     print("=" * 50)
-    
-    # Initialize posts.json file if it doesn't exist (but don't reset existing data)
-    posts_file = 'posts.json'
-    if not os.path.exists(posts_file):
-        initial_posts = {
-            'metadata': {
-                'total_posts': 0,
-                'last_updated': None,
-                'server_started': datetime.now().isoformat()
-            },
-            'posts': []
-        }
-        
-        try:
-            with open(posts_file, 'w') as f:
-                json.dump(initial_posts, f, indent=2)
-            print(f"✅ Created initial {posts_file}")
-        except Exception as e:
-            print(f"⚠️  Could not create {posts_file}: {e}")
-    else:
-        print(f"📄 Using existing {posts_file} as backup storage")
-    
-    # Test Supabase connection
-    if SUPABASE_AVAILABLE and settings and settings.supabase_url and settings.supabase_service_key:
-        try:
-            test_client = create_client(
-                settings.supabase_url, 
-                settings.supabase_service_key
-            )
-            # Test connection by trying to access the table
-            test_response = test_client.table('mock_twitter_posts').select('id').limit(1).execute()
-            print("✅ Supabase connection tested successfully")
-        except Exception as e:
-            print(f"⚠️  Supabase connection test failed: {e}")
-            print("   Posts will be saved to JSON only")
-    
-    server_address = ('', 8000)
-    httpd = HTTPServer(server_address, PostsHandler)
+
+    if os.path.exists(POSTS_FILE) or os.path.exists(LEGACY_POSTS_FILE):
+        print("📄 Using existing posts as backup storage")
+
     print(f"\n🚀 Server running on http://localhost:8000")
     print(f"📁 Current directory: {os.getcwd()}")
     print("📝 Storage: Supabase (primary) + Local JSON (backup)")
     print("\n🔄 Ready to receive posts...\n")
-    
-    try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        print("\n\n🛑 Server stopped by user")
-        httpd.server_close() 
\ No newline at end of file
+
+    # Single worker: posts.jsonl is a process-local backup file
+    uvicorn.run(app, host="0.0.0.0", port=8000, workers=1)
@@ -106,13 +106,13 @@ def print_manual_instructions():
 CREATE TABLE mock_twitter_posts (
     id BIGSERIAL PRIMARY KEY,
     text TEXT NOT NULL CHECK (length(text) > 0),
-    image TEXT, -- base64 encoded image or URL
+    image TEXT, -- public URL in the tweet-images Storage bucket (older rows may hold base64 data: URLs)
     timestamp TIMESTAMP WITH TIME ZONE NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
 );
 
 -- Indexes
-CREATE INDEX idx_mock_twitter_posts_timestamp ON mock_twitter_posts(timestamp);
+CREATE INDEX idx_mock_twitter_posts_timestamp ON mock_twitter_posts(timestamp DESC);
 CREATE INDEX idx_mock_twitter_posts_created_at ON mock_twitter_posts(created_at);
 
 -- RLS policies
@@ -129,7 +129,8 @@ CREATE POLICY "Allow all operations for service role" ON mock_twitter_posts
     print("--- END SQL ---")
     print()
     print("4. Click 'Run' to execute")
-    print("5. Start your Mock Twitter server")
+    print("5. Under Storage, create a public bucket named 'tweet-images' for post images")
+    print("6. Start your Mock Twitter server")
     print()
     print("✨ After setup, your posts will be saved to both:")
     print("   • Supabase (primary storage)")
@@ -4,7 +4,7 @@ Test script for Mock Twitter Supabase integration
 Tests both local JSON and Supabase storage
 """
 
-import json
+import orjson
 import requests
 import time
 from datetime import datetime
@@ -30,6 +30,8 @@ def test_post_storage():
     ]
     
     server_url = "http://localhost:8000/save-post"
+    # One session for all test posts so they share a keep-alive connection
+    session = requests.Session()
     
     print(f"📡 Testing connection to {server_url}")
     
@@ -37,9 +39,9 @@ def test_post_storage():
         print(f"\n📝 Sending test post {i}...")
         
         try:
-            response = requests.post(
+            response = session.post(
                 server_url,
-                json=post,
+                data=orjson.dumps(post),
                 headers={"Content-Type": "application/json"},
                 timeout=10
             )
@@ -73,12 +75,10 @@ def test_post_storage():
     print(f"\n📁 Checking local JSON file...")
     
     try:
-        with open('../mock-twitter/posts.json', 'r') as f:
-            local_data = json.load(f)
+        with open('../mock-twitter/posts.jsonl', 'rb') as f:
+            post_count = sum(1 for line in f if line.strip())
         
-        post_count = len(local_data.get('posts', []))
         print(f"✅ Local JSON has {post_count} posts")
-        print(f"   Total posts: {local_data.get('metadata', {}).get('total_posts', 0)}")
         
     except FileNotFoundError:
         print("❌ Local JSON file not found")
@@ -0,0 +1,66 @@
+"""
+Content-addressed cache for downloaded tweet images.
+
+Each image URL maps to model/sample/.cache/<sha1[:2]>/<sha1>.bin, with the
+response's ETag/Last-Modified kept in a sibling .meta file so later runs can
+send a conditional GET and skip the transfer on 304 Not Modified.
+download_image is the async fetch shared by the model scripts.
+"""
+
+import contextlib
+import hashlib
+import os
+import orjson
+
+CACHE_DIR = "model/sample/.cache"
+
+def cache_paths(url):
+    """Return (bin_path, meta_path) for an image URL"""
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    base = os.path.join(CACHE_DIR, digest[:2], digest)
+    return base + ".bin", base + ".meta"
+
+def conditional_headers(bin_path, meta_path):
+    """Validators for a conditional GET, or {} if nothing usable is cached"""
+    if not (os.path.exists(bin_path) and os.path.exists(meta_path)):
+        return {}
+    try:
+        with open(meta_path, "rb") as f:
+            meta = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+def save_meta(meta_path, response_headers):
+    """Record the response validators next to the cached body"""
+    meta = {
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+    }
+    with open(meta_path, "wb") as f:
+        f.write(orjson.dumps(meta))
+
+async def download_image(client, url, semaphore=None):
+    """Fetch an image into the cache with an httpx.AsyncClient and return its local path, or None"""
+    bin_path, meta_path = cache_paths(url)
+    try:
+        async with semaphore or contextlib.nullcontext():
+            headers = conditional_headers(bin_path, meta_path)
+            async with client.stream("GET", url, timeout=10, headers=headers) as resp:
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+                    os.makedirs(os.path.dirname(bin_path), exist_ok=True)
+                    # Stream to a temp file so an interrupted download never looks cached
+                    with open(bin_path + ".tmp", "wb") as f:
+                        async for chunk in resp.aiter_bytes(1 << 20):
+                            f.write(chunk)
+                    os.replace(bin_path + ".tmp", bin_path)
+                    save_meta(meta_path, resp.headers)
+    except Exception as e:
+        print(f"Failed to download {url}: {e}")
+    return bin_path if os.path.exists(bin_path) else None
@@ -0,0 +1,12 @@
+"""
+Shared reader for the CrisisMMD sample metadata CSV.
+
+Rows come back as a DataFrame of strings (empty cells as ''), the same
+values csv.DictReader gave, so every script parses the file the same way.
+"""
+
+import pandas as pd
+
+def load_rows(path, nrows=None, usecols=None):
+    """Return the first nrows metadata rows (all when None), limited to usecols if given"""
+    return pd.read_csv(path, dtype=str, keep_default_na=False, nrows=nrows, usecols=usecols)
@@ -12,11 +12,10 @@ It takes tweet text and an image, and returns structured labels for:
 """
 
 import os
+import functools
 import google.generativeai as genai
-import json
-import re
+import orjson
 from dotenv import load_dotenv
-from PIL import Image
 
 # Load environment variables from .env file in the project root
 load_dotenv()
@@ -26,22 +25,20 @@ if API_KEY is None:
     raise EnvironmentError("Please set the GOOGLE_API_KEY variable in your .env file.")
 genai.configure(api_key=API_KEY)
 
-def classify_crisismmd(tweet_text, image_path, image_url=None):
-    """
-    Imitates CrisisMMD annotation using Gemini 2.5 Flash.
-
-    Args:
-        tweet_text (str): The tweet text.
-        image_path (str): Path to the tweet image file.
-        image_url (str, optional): Original image URL for reference.
+# One model for every call; JSON mode makes the reply parseable as-is
+_MODEL = genai.GenerativeModel(
+    'gemini-2.5-flash',
+    generation_config={'response_mime_type': 'application/json'},
+)
 
-    Returns:
-        dict: Structured results with keys matching CrisisMMD columns.
-    """
+@functools.lru_cache(maxsize=128)
+def _read_image(image_path, mtime):
+    """Read image bytes; mtime is part of the cache key so edited files are re-read"""
     with open(image_path, 'rb') as img_file:
-        image_bytes = img_file.read()
+        return img_file.read()
 
-    prompt = f"""
+# Annotation instructions shared by the single-tweet and batch prompts
+_PROMPT_HEADER = """
     You are an expert annotator for the CrisisMMD dataset. Given a tweet's text, image, and image URL, assign the following labels, using only the provided options. If unsure, use 'not_informative', 'not_humanitarian', or 'dont_know_or_cant_judge'.
 
 **Task 1: Informative vs Not informative**
@@ -78,19 +75,76 @@ Return a JSON object with these keys:
 - tweet_text (str)
 - image_url (str)
 
-Tweet text: {tweet_text}
+"""
+
+# Tweets per Gemini request in classify_crisismmd_batch
+BATCH_SIZE = 8
+
+_BATCH_PREAMBLE = """You will be given {count} numbered tweets, each followed by its image.
+Annotate every tweet independently using the instructions below, and return a JSON array
+containing exactly one such object per tweet, in the order given.
+"""
+
+_PROMPT_SUFFIX = """Tweet text: {tweet_text}
 Image URL: {image_url}
 """
 
-    model = genai.GenerativeModel('gemini-2.5-flash')
-    response = model.generate_content([prompt, image_bytes])
+def _build_prompt(tweet_text, image_url):
+    return _PROMPT_HEADER + _PROMPT_SUFFIX.format(tweet_text=tweet_text, image_url=image_url)
 
-    # Extract JSON from response
-    match = re.search(r'\{[\s\S]*\}', response.text)
-    if not match:
-        raise ValueError("Model response did not contain valid JSON.")
-    result = json.loads(match.group(0))
+def _parse_response(response, tweet_text, image_url):
+    try:
+        result = orjson.loads(response.text)
+    except orjson.JSONDecodeError as e:
+        raise ValueError("Model response did not contain valid JSON.") from e
     # Include original tweet and image URL
     result['tweet_text'] = tweet_text
     result['image_url'] = image_url
-    return result
\ No newline at end of file
+    return result
+
+def classify_crisismmd(tweet_text, image_path, image_url=None):
+    """
+    Imitates CrisisMMD annotation using Gemini 2.5 Flash.
+
+    Args:
+        tweet_text (str): The tweet text.
+        image_path (str): Path to the tweet image file.
+        image_url (str, optional): Original image URL for reference.
+
+    Returns:
+        dict: Structured results with keys matching CrisisMMD columns.
+    """
+    image_bytes = _read_image(image_path, os.path.getmtime(image_path))
+    response = _MODEL.generate_content([_build_prompt(tweet_text, image_url), image_bytes])
+    return _parse_response(response, tweet_text, image_url)
+
+async def classify_crisismmd_async(tweet_text, image_path, image_url=None):
+    """Async version of classify_crisismmd, for classifying many tweets concurrently."""
+    image_bytes = _read_image(image_path, os.path.getmtime(image_path))
+    response = await _MODEL.generate_content_async([_build_prompt(tweet_text, image_url), image_bytes])
+    return _parse_response(response, tweet_text, image_url)
+
+async def classify_crisismmd_batch(items):
+    """
+    Classify several tweets with a single Gemini request.
+
+    Args:
+        items (list): Up to BATCH_SIZE (tweet_text, image_path, image_url) tuples.
+
+    Returns:
+        list: One result dict per item, in the same order.
+    """
+    contents = [_BATCH_PREAMBLE.format(count=len(items)) + _PROMPT_HEADER]
+    for i, (tweet_text, image_path, image_url) in enumerate(items, 1):
+        contents.append(f"Tweet {i}\nTweet text: {tweet_text}\nImage URL: {image_url}\n")
+        contents.append(_read_image(image_path, os.path.getmtime(image_path)))
+
+    response = await _MODEL.generate_content_async(contents)
+    results = orjson.loads(response.text)
+    if not isinstance(results, list) or len(results) != len(items):
+        raise ValueError(f"Expected a JSON array of {len(items)} results from the model.")
+    for result, (tweet_text, _, image_url) in zip(results, items):
+        # Include original tweet and image URL
+        result['tweet_text'] = tweet_text
+        result['image_url'] = image_url
+    return results
@@ -1,10 +1,15 @@
-import os
-import csv
-from classification import classify_crisismmd
+import asyncio
+import httpx
+from classification import BATCH_SIZE, classify_crisismmd_batch
+from _image_cache import download_image
+from _metadata import load_rows
 
 CSV_PATH = "model/sample/california_fires/metadata.csv"
-SAMPLE_DIR = "model/sample/california_fires"
 N_ROWS = 2  # Change this to set how many rows to process
+MAX_CONCURRENCY = 8  # Concurrent batches (downloads + one Gemini request each), kept low for rate limits
+
+# Only these metadata columns are used
+CSV_COLUMNS = ["tweet_id", "image_id", "tweet_text", "image_url"]
 
 CONF_COLUMNS = [
     "text_info_conf",
@@ -14,42 +19,71 @@ CONF_COLUMNS = [
     "image_damage_conf"
 ]
 
-def download_image(url, dest_path):
-    if os.path.exists(dest_path):
-        return
-    import requests
-    try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        with open(dest_path, "wb") as f:
-            f.write(resp.content)
-    except Exception as e:
-        print(f"Failed to download {url}: {e}")
-
-def main():
-    with open(CSV_PATH, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for idx, row in enumerate(reader):
-            if idx >= N_ROWS:
-                break
-            image_url = row["image_url"]
-            image_id = row["image_id"]
-            tweet_text = row["tweet_text"]
-            print(f"Processing {idx+1}/{N_ROWS}: tweet_id={row['tweet_id']}, image_id={image_id}")
-            image_ext = os.path.splitext(image_url)[1].split("?")[0] or ".jpg"
-            image_filename = f"{image_id}{image_ext}"
-            image_path = os.path.join(SAMPLE_DIR, image_filename)
-            download_image(image_url, image_path)
-            if not os.path.exists(image_path):
-                print(f"Image file does not exist, skipping classification for {image_id}: {image_path}")
-                print(f"Skipped {image_id} due to missing image.")
-                continue
-            try:
-                result = classify_crisismmd(tweet_text, image_path)
-                print(f"Classified tweet_id={row['tweet_id']}, image_id={image_id}")
-            except Exception as e:
-                print(f"Classification failed for {image_id}: {e}")
-                continue
+async def process_batch(client, semaphore, start, rows):
+    """Download a batch's images concurrently, then classify them in one Gemini request"""
+    async with semaphore:
+        for idx, row in enumerate(rows, start):
+            print(f"Processing {idx+1}/{N_ROWS}: tweet_id={row['tweet_id']}, image_id={row['image_id']}")
+        image_paths = await asyncio.gather(*(download_image(client, row["image_url"]) for row in rows))
+
+        results = [None] * len(rows)
+        ready = []
+        for i, (row, image_path) in enumerate(zip(rows, image_paths)):
+            if image_path is None:
+                print(f"Image file does not exist, skipping classification for {row['image_id']}: {row['image_url']}")
+                print(f"Skipped {row['image_id']} due to missing image.")
+            else:
+                ready.append(i)
+        if not ready:
+            return results
+
+        try:
+            classified = await classify_crisismmd_batch(
+                [(rows[i]["tweet_text"], image_paths[i], None) for i in ready]
+            )
+        except Exception as e:
+            print(f"Classification failed for {[rows[i]['image_id'] for i in ready]}: {e}")
+            return results
+
+        for i, result in zip(ready, classified):
+            print(f"Classified tweet_id={rows[i]['tweet_id']}, image_id={rows[i]['image_id']}")
+            results[i] = result
+        return results
+
+async def main():
+    # Stops reading after N_ROWS and only keeps the columns used here
+    rows = load_rows(CSV_PATH, N_ROWS, usecols=CSV_COLUMNS).to_dict("records")
+    # Downloads and Gemini calls are I/O waits, so run batches concurrently
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    async with httpx.AsyncClient(
+        follow_redirects=True,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+        ),
+    ) as client:
+        batches = await asyncio.gather(
+            *(process_batch(client, semaphore, start, rows[start:start + BATCH_SIZE])
+              for start in range(0, len(rows), BATCH_SIZE)),
+            return_exceptions=True,
+        )
+    # One entry per row, None where the image or classification was missing
+    results = []
+    for start, batch in zip(range(0, len(rows), BATCH_SIZE), batches):
+        if isinstance(batch, BaseException):
+            print(f"Batch starting at row {start+1} failed: {batch}")
+            batch = [None] * len(rows[start:start + BATCH_SIZE])
+        results.extend(batch)
+
+    # Report the predicted confidence scores for each classified row
+    for row, result in zip(rows, results):
+        if result is None:
+            continue
+        print(f"Confidence for tweet_id={row['tweet_id']}, image_id={row['image_id']}:")
+        for col in CONF_COLUMNS:
+            print(f"  {col}: {result.get(col)}")
+    return results
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
@@ -1,17 +1,34 @@
 """
 Standalone script to evaluate confidence prediction errors.
 
-This script reads the ground-truth metadata CSV and the classification results JSON,
+This script reads the ground-truth metadata CSV and the classification results (JSON Lines),
 computes mean absolute error (MAE) for each confidence column and overall average error,
 and prints an error report.
 """
 import os
-import csv
-import json
+import orjson
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # Paths to metadata and results
 CSV_PATH = os.path.join(os.path.dirname(__file__), "sample", "california_fires", "metadata.csv")
-RESULTS_PATH = os.path.join(os.path.dirname(__file__), "sample", "california_fires", "classification_results.json")
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "sample", "california_fires", "classification_results.jsonl")
+
+# Columns identifying one tweet/image pair
+KEY_COLUMNS = ["tweet_id", "image_id"]
+
+# Metadata CSV rows parsed per chunk
+METADATA_CHUNK_ROWS = 50_000
+
+# Result sets at least this large use the numba kernel (when installed);
+# below it the JIT compile costs more than it saves
+NUMBA_MIN_ROWS = 100_000
 
 # Confidence columns to compare
 CONF_COLUMNS = [
@@ -22,70 +39,113 @@ CONF_COLUMNS = [
     "image_damage_conf"
 ]
 
-def load_metadata(csv_path):
-    """Load metadata CSV into dict keyed by (tweet_id, image_id)."""
-    mapping = {}
-    with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            key = (row['tweet_id'], row['image_id'])
-            mapping[key] = row
-    return mapping
+def load_metadata(csv_path, keys):
+    """
+    Load the key and confidence columns of the metadata rows matching keys.
+
+    The CSV is streamed in METADATA_CHUNK_ROWS chunks and only rows whose
+    (tweet_id, image_id) appears in keys are kept, with float32 confidences,
+    so memory tracks the number of results rather than the size of the CSV.
+    """
+    wanted = pd.MultiIndex.from_frame(keys[KEY_COLUMNS])
+    chunks = []
+    for chunk in pd.read_csv(
+        csv_path,
+        usecols=KEY_COLUMNS + CONF_COLUMNS,
+        dtype={col: str for col in KEY_COLUMNS},
+        chunksize=METADATA_CHUNK_ROWS,
+    ):
+        chunk = chunk[pd.MultiIndex.from_frame(chunk[KEY_COLUMNS]).isin(wanted)].copy()
+        for col in CONF_COLUMNS:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('float32')
+        chunks.append(chunk)
+
+    if not chunks:
+        return pd.DataFrame(columns=KEY_COLUMNS + CONF_COLUMNS)
+    metadata = pd.concat(chunks, ignore_index=True)
+    # Later rows win for a repeated (tweet_id, image_id), as before
+    return metadata.drop_duplicates(KEY_COLUMNS, keep='last')
 
 
 def load_results(json_path):
-    """Load classification results JSON into list of records."""
-    with open(json_path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load classification results (one JSON object per line) into a DataFrame."""
+    with open(json_path, 'rb') as f:
+        results = pd.DataFrame.from_records([orjson.loads(line) for line in f if line.strip()])
+    results = results.reindex(columns=KEY_COLUMNS + CONF_COLUMNS)
+    results[KEY_COLUMNS] = results[KEY_COLUMNS].astype(str)
+    return results
+
+
+def _abs_error_sums_numpy(actual, predicted):
+    """Per-column sum of |actual - predicted| and count of non-NaN pairs, for (columns, rows) arrays."""
+    errors = np.abs(actual - predicted)
+    valid = ~np.isnan(errors)
+    return np.where(valid, errors, 0).sum(axis=1, dtype=np.float64), valid.sum(axis=1)
+
+
+if NUMBA_AVAILABLE:
+    # No fastmath: it assumes no NaNs, and NaN marks a missing value here
+    @njit(parallel=True, cache=True)
+    def _abs_error_sums_numba(actual, predicted):
+        """Numba version of _abs_error_sums_numpy; one thread per column, so no shared accumulators."""
+        n_cols, n_rows = actual.shape
+        sums = np.zeros(n_cols, np.float64)
+        counts = np.zeros(n_cols, np.int64)
+        for j in prange(n_cols):
+            total = 0.0
+            count = 0
+            for i in range(n_rows):
+                err = actual[j, i] - predicted[j, i]
+                if not np.isnan(err):
+                    total += abs(err)
+                    count += 1
+            sums[j] = total
+            counts[j] = count
+        return sums, counts
 
 
 def compute_error(metadata, results):
-    """Compute MAE per column and overall MAE."""
-    errors = {col: 0.0 for col in CONF_COLUMNS}
-    counts = {col: 0 for col in CONF_COLUMNS}
-    total_error = 0.0
-    total_count = 0
-
-    for rec in results:
-        key = (rec.get('tweet_id'), rec.get('image_id'))
-        actual_row = metadata.get(key)
-        if not actual_row:
-            print(f"Warning: no metadata for {key}, skipping.")
-            continue
-        for col in CONF_COLUMNS:
-            actual_val = actual_row.get(col)
-            pred_val = rec.get(col)
-            try:
-                a = float(actual_val)
-                p = float(pred_val)
-                err = abs(a - p)
-                errors[col] += err
-                counts[col] += 1
-                total_error += err
-                total_count += 1
-            except Exception:
-                # skip if missing or non-numeric
-                continue
-
-    mae = {col: (errors[col] / counts[col] if counts[col] else None) for col in CONF_COLUMNS}
-    overall_mae = (total_error / total_count) if total_count else None
-    return mae, overall_mae, counts
+    """Compute the error report: MAE ('mae') and sample count ('n') per confidence column."""
+    df = results.merge(metadata, on=KEY_COLUMNS, how='left', suffixes=('_p', '_a'), indicator=True)
+    for key in df.loc[df['_merge'] == 'left_only', KEY_COLUMNS].itertuples(index=False, name=None):
+        print(f"Warning: no metadata for {key}, skipping.")
+    df = df[df['_merge'] == 'both']
+
+    # One contiguous float32 row per confidence column; missing or non-numeric
+    # values become NaN and drop out of the sums and counts
+    actual, predicted = (
+        np.vstack([pd.to_numeric(df[col + suffix], errors='coerce').to_numpy(np.float32) for col in CONF_COLUMNS])
+        for suffix in ('_a', '_p')
+    )
+    if NUMBA_AVAILABLE and len(df) >= NUMBA_MIN_ROWS:
+        sums, counts = _abs_error_sums_numba(actual, predicted)
+    else:
+        sums, counts = _abs_error_sums_numpy(actual, predicted)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mae = sums / counts  # NaN where a column has no valid samples
+    return pd.DataFrame({'mae': mae, 'n': counts}, index=CONF_COLUMNS)
+
+
+def overall_mae(report):
+    """MAE across all columns and rows, i.e. per-column MAEs weighted by sample count."""
+    total_count = report['n'].sum()
+    if not total_count:
+        return None
+    return float(report['mae'].fillna(0).dot(report['n']) / total_count)
 
 
 def main():
-    metadata = load_metadata(CSV_PATH)
     results = load_results(RESULTS_PATH)
+    metadata = load_metadata(CSV_PATH, results)
 
-    mae, overall_mae, counts = compute_error(metadata, results)
+    report = compute_error(metadata, results)
+    overall = overall_mae(report)
 
     print("Confidence Error Report:")
-    for col in CONF_COLUMNS:
-        if counts[col]:
-            print(f"  {col}: MAE = {mae[col]:.4f} over {counts[col]} samples")
-        else:
-            print(f"  {col}: no valid samples to compute error")
-    if overall_mae is not None:
-        print(f"Overall MAE across all columns and rows: {overall_mae:.4f}")
+    print(report.to_string(float_format='{:.4f}'.format, na_rep='no valid samples'))
+    if overall is not None:
+        print(f"Overall MAE across all columns and rows: {overall:.4f}")
     else:
         print("No valid comparisons found.")
 
@@ -1,15 +1,44 @@
 import os
-import csv
+import orjson
+import shutil
+import shelve
+import hashlib
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from classification import classify_crisismmd
-from PIL import Image
+from _image_cache import CACHE_DIR, cache_paths, conditional_headers, download_image, save_meta
+from _metadata import load_rows
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+    print("⚠️  httpx not available, downloading images on a thread pool with requests")
 
 CSV_PATH = "model/sample/california_fires/metadata.csv"
-SAMPLE_DIR = "model/sample/california_fires"
-RESULTS_PATH = "model/sample/california_fires/classification_results.json"
+# One JSON result per line, appended as rows are classified
+RESULTS_PATH = "model/sample/california_fires/classification_results.jsonl"
+
+# Classification results keyed by image content and tweet text, so duplicate
+# rows and re-runs skip the Gemini call; delete it to force reclassification
+CLASSIFY_CACHE_PATH = os.path.join(CACHE_DIR, "classifications")
 
 # Number of rows to process
 N_ROWS = 10  # Change this to set how many rows to process
+MAX_DOWNLOADS = 8  # Concurrent image downloads
+
+# Shared session for the thread-pool fallback so downloads reuse pooled connections
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.1))
+_SESSION.mount('https://', _ADAPTER)
+_SESSION.mount('http://', _ADAPTER)
 
 # Columns to compare for confidence scores
 CONF_COLUMNS = [
@@ -20,74 +49,185 @@ CONF_COLUMNS = [
     "image_damage_conf"
 ]
 
+def _float_or_nan(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _to_float32(values):
+    """Cast confidence values to float32 in one go, with missing ones as NaN"""
+    try:
+        return np.array([np.nan if v in (None, "") else v for v in values], dtype=np.float32)
+    except (TypeError, ValueError):
+        # Something non-numeric in the row; treat just that value as missing
+        return np.array([_float_or_nan(v) for v in values], dtype=np.float32)
+
 # Function to compare actual vs predicted confidence scores
 def compare_scores(row, result):
-    diffs = []
-    for col in CONF_COLUMNS:
-        actual = row.get(col)
-        predicted = result.get(col)
-        try:
-            actual_val = float(actual) if actual not in (None, "") else None
-            predicted_val = float(predicted) if predicted not in (None, "") else None
-        except Exception:
-            actual_val, predicted_val = actual, predicted
-        if actual_val != predicted_val:
-            diffs.append(f"{col}: actual={actual_val}, predicted={predicted_val}")
-    return diffs
-
-def download_image(url, dest_path):
-    if os.path.exists(dest_path):
-        return
+    actual = _to_float32([row.get(col) for col in CONF_COLUMNS])
+    predicted = _to_float32([result.get(col) for col in CONF_COLUMNS])
+    # Missing on both sides is not a difference
+    differs = (actual != predicted) & ~(np.isnan(actual) & np.isnan(predicted))
+    return [
+        f"{col}: actual={None if np.isnan(a) else a}, predicted={None if np.isnan(p) else p}"
+        for col, a, p, d in zip(CONF_COLUMNS, actual, predicted, differs)
+        if d
+    ]
+
+def download_image_sync(url):
+    """Blocking _image_cache.download_image for the thread-pool fallback"""
+    bin_path, meta_path = cache_paths(url)
     try:
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        with open(dest_path, "wb") as f:
-            f.write(resp.content)
+        with _SESSION.get(url, timeout=10, stream=True, headers=conditional_headers(bin_path, meta_path)) as resp:
+            if resp.status_code != 304:
+                resp.raise_for_status()
+                os.makedirs(os.path.dirname(bin_path), exist_ok=True)
+                # Stream to a temp file so an interrupted download never looks cached
+                resp.raw.decode_content = True
+                with open(bin_path + ".tmp", "wb") as f:
+                    shutil.copyfileobj(resp.raw, f, length=1 << 20)
+                os.replace(bin_path + ".tmp", bin_path)
+                save_meta(meta_path, resp.headers)
     except Exception as e:
         print(f"Failed to download {url}: {e}")
+    return bin_path if os.path.exists(bin_path) else None
 
-def main():
-    results = []
-    with open(CSV_PATH, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for idx, row in enumerate(reader):
-            if idx >= N_ROWS:
-                break  # Only process up to N_ROWS rows
-            image_url = row["image_url"]
-            image_id = row["image_id"]
-            tweet_text = row["tweet_text"]
-            print(f"Processing {idx+1}/{N_ROWS}: tweet_id={row['tweet_id']}, image_id={image_id}")
-            # Save image
-            image_ext = os.path.splitext(image_url)[1].split("?")[0] or ".jpg"
-            image_filename = f"{image_id}{image_ext}"
-            image_path = os.path.join(SAMPLE_DIR, image_filename)
-            download_image(image_url, image_path)
-            if not os.path.exists(image_path):
-                print(f"Image file does not exist, skipping {image_id}")
-                continue
+def _file_sha256(path):
+    """Hex SHA-256 of a file, hashed in chunks rather than read whole"""
+    with open(path, "rb") as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def _classify_cache_key(tweet_text, image_path):
+    return f"{_file_sha256(image_path)}:{tweet_text}"
+
+def classify_cached(classify_cache, tweet_text, image_path):
+    """classify_crisismmd, memoized on disk by (image sha256, tweet_text)"""
+    key = _classify_cache_key(tweet_text, image_path)
+    result = classify_cache.get(key)
+    if result is None:
+        result = classify_crisismmd(tweet_text, image_path)
+        classify_cache[key] = result
+    else:
+        print("Using cached classification")
+    return result
+
+def classify_row(classify_cache, out, idx, row, image_path):
+    """Classify one downloaded row, compare its scores and append it to the results file"""
+    image_id = row["image_id"]
+    tweet_text = row["tweet_text"]
+    print(f"Processing {idx+1}/{N_ROWS}: tweet_id={row['tweet_id']}, image_id={image_id}")
+    if image_path is None:
+        print(f"Image file does not exist, skipping {image_id}")
+        return
+    try:
+        result = classify_cached(classify_cache, tweet_text, image_path)
+        # Compare confidence scores
+        diffs = compare_scores(row, result)
+        if diffs:
+            print(f"Differences for tweet_id={row['tweet_id']}, image_id={image_id}:")
+            for d in diffs:
+                print("  " + d)
+        else:
+            print(f"No differences for tweet_id={row['tweet_id']}, image_id={image_id}")
+        # Store result as soon as it exists, so an interrupted run keeps its progress
+        result["tweet_id"] = row["tweet_id"]
+        result["image_id"] = image_id
+        out.write(orjson.dumps(result) + b"\n")
+        out.flush()
+        print(f"Classified {image_id}")
+    except Exception as e:
+        print(f"Classification failed for {image_id}: {e}")
+
+async def download_into(rows, ready):
+    """Download every row's image concurrently, queueing (idx, row, path) as each finishes"""
+    semaphore = asyncio.Semaphore(MAX_DOWNLOADS)
+    async with httpx.AsyncClient(
+        follow_redirects=True,
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+        ),
+    ) as client:
+        async def fetch(idx, row):
+            ready.put((idx, row, await download_image(client, row["image_url"], semaphore)))
+
+        await asyncio.gather(*(fetch(idx, row) for idx, row in enumerate(rows)))
+
+def download_and_classify_async(rows, classify_cache, out):
+    """
+    Download on a background event loop and classify on this thread as images land.
+
+    Classification (and the shelve cache) stay on the calling thread, so
+    Gemini calls run one at a time while the remaining downloads continue.
+    """
+    ready = queue.Queue()
+
+    def producer():
+        try:
+            asyncio.run(download_into(rows, ready))
+        finally:
+            ready.put(None)  # No more downloads
+
+    downloader = threading.Thread(target=producer, daemon=True)
+    downloader.start()
+    while (item := ready.get()) is not None:
+        classify_row(classify_cache, out, *item)
+    downloader.join()
+
+def download_and_classify_threaded(rows, classify_cache, out):
+    """Thread-pool fallback: download on workers, classify on this thread as downloads finish"""
+    with ThreadPoolExecutor(max_workers=MAX_DOWNLOADS) as executor:
+        futures = {
+            executor.submit(download_image_sync, row["image_url"]): (idx, row)
+            for idx, row in enumerate(rows)
+        }
+        for future in as_completed(futures):
+            idx, row = futures[future]
+            classify_row(classify_cache, out, idx, row, future.result())
+
+def load_done_keys(results_path):
+    """Return the (tweet_id, image_id) pairs already in the results file"""
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, "rb+") as f:
+        for line in f:
             try:
-                result = classify_crisismmd(tweet_text, image_path)
-                # Compare confidence scores
-                diffs = compare_scores(row, result)
-                if diffs:
-                    print(f"Differences for tweet_id={row['tweet_id']}, image_id={image_id}:")
-                    for d in diffs:
-                        print("  " + d)
-                else:
-                    print(f"No differences for tweet_id={row['tweet_id']}, image_id={image_id}")
-                # Store result
-                result["tweet_id"] = row["tweet_id"]
-                result["image_id"] = image_id
-                results.append(result)
-                print(f"Classified {image_id}")
-            except Exception as e:
-                print(f"Classification failed for {image_id}: {e}")
-                continue
-
-    # Save results
-    import json
-    with open(RESULTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+                record = orjson.loads(line)
+            except ValueError:
+                continue  # Blank, or cut short by an interrupted run
+            done.add((record.get("tweet_id"), record.get("image_id")))
+        # Terminate a cut-short last line so the next append starts on its own line
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    return done
+
+def main():
+    rows = load_rows(CSV_PATH, N_ROWS).to_dict("records")  # Only process up to N_ROWS rows
+
+    # Resume: skip rows classified by an earlier run
+    done = load_done_keys(RESULTS_PATH)
+    if done:
+        remaining = [row for row in rows if (row["tweet_id"], row["image_id"]) not in done]
+        print(f"Skipping {len(rows) - len(remaining)} rows already in {RESULTS_PATH}")
+        rows = remaining
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with shelve.open(CLASSIFY_CACHE_PATH) as classify_cache, open(RESULTS_PATH, "ab") as out:
+        # Overlap downloads with classification instead of waiting for every image first
+        if HTTPX_AVAILABLE:
+            download_and_classify_async(rows, classify_cache, out)
+        else:
+            download_and_classify_threaded(rows, classify_cache, out)
 
 if __name__ == "__main__":
     try:
@@ -1,30 +1,45 @@
-import base64
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
 import random
+import sys
 import time
 from datetime import datetime, timezone
 
-# Path to your JPEG file
-image_path = "model/sample/california_fires/917791044158185473_0.jpg"
+sys.path.insert(0, "model")
+from _image_cache import cache_paths
 
-# Read and encode image
-with open(image_path, "rb") as f:
-    b64 = base64.b64encode(f.read()).decode("utf-8")
-data_url = f"data:image/jpeg;base64,{b64}"
+# Keep-alive session; connection failures are retried, but a POST that reached
+# the server is not (urllib3 only retries idempotent methods on status codes)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])))
+
+# Sample tweet image (917791044158185473_0), read from the model scripts'
+# download cache and fetched into it on first run
+IMAGE_URL = "http://pbs.twimg.com/media/DLyi_WYVYAApwNg.jpg"
+image_path = cache_paths(IMAGE_URL)[0]
+if not os.path.exists(image_path):
+    image_resp = SESSION.get(IMAGE_URL, timeout=30)
+    image_resp.raise_for_status()
+    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+    with open(image_path, "wb") as f:
+        f.write(image_resp.content)
 
-# Prepare payload
+# Prepare payload; the image goes up as a raw multipart file part, not base64
 payload = {
-    "image_data": data_url,
     "tweet_text": "Crazy wildfires raging through San Francisco are crazy yo! There are so many people affected by this disaster!!! #CaliforniaFires",
     "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 }
 
-# Send POST request
-resp = requests.post(
-    "https://calhacks-deploy-production.up.railway.app/api/v1/orchestrate",
-    json=payload,
-    timeout=60
-)
+# Send POST request, streaming the image from disk
+with open(image_path, "rb") as f:
+    resp = SESSION.post(
+        "https://calhacks-deploy-production.up.railway.app/api/v1/orchestrate",
+        data=payload,
+        files={"image_data": ("image.jpg", f, "image/jpeg")},
+        timeout=60
+    )
 
 print(resp.status_code)
 print(resp.text)
\ No newline at end of file
@@ -5,6 +5,7 @@ Test script for emergency contact and SMS functions
 
 import sys
 import os
+import asyncio
 
 # Add the backend directory to the path
 sys.path.append('backend')
@@ -12,7 +13,7 @@ sys.path.append('backend')
 # Import the functions we want to test
 from voice_agent.trigger_call import get_emergency_contacts, send_sms
 
-def test_get_emergency_contacts():
+async def test_get_emergency_contacts():
     """Test the get_emergency_contacts function"""
     print("🧪 Testing get_emergency_contacts function...")
     
@@ -20,7 +21,7 @@ def test_get_emergency_contacts():
     test_phone = "+16692209078"
     print(f"🔍 Testing with phone number: {test_phone}")
     
-    contacts = get_emergency_contacts(test_phone)
+    contacts = await get_emergency_contacts(test_phone)
     
     print(f"📋 Result: Found {len(contacts)} emergency contacts")
     for i, contact in enumerate(contacts, 1):
@@ -28,7 +29,7 @@ def test_get_emergency_contacts():
     
     return contacts
 
-def test_send_sms():
+async def test_send_sms():
     """Test the send_sms function"""
     print("\n🧪 Testing send_sms function...")
     
@@ -39,27 +40,33 @@ def test_send_sms():
     print(f"📱 Sending test SMS to: {test_phone}")
     print(f"📝 Message: {test_message}")
     
-    result = send_sms(test_phone, test_message)
+    result = await send_sms(test_phone, test_message)
     
     print(f"📋 SMS Result: {result}")
     return result
 
-def main():
+async def main():
     """Run all tests"""
     print("🚀 Starting emergency function tests...\n")
     
     # Test 1: Emergency Contacts
-    contacts = test_get_emergency_contacts()
+    contacts = await test_get_emergency_contacts()
     
     # Test 2: SMS (only if we found contacts or want to test anyway)
-    sms_result = test_send_sms()
+    sms_result = await test_send_sms()
     
     # Test 3: If we found emergency contacts, test sending SMS to them
     if contacts:
         print(f"\n🧪 Testing SMS to emergency contacts...")
+        contact_message = "🚨 This is a test emergency alert. Your contact may need assistance. (This is just a test - please ignore)"
         for contact in contacts:
             print(f"📱 Sending test SMS to emergency contact: {contact}")
-            contact_result = send_sms(contact, "🚨 This is a test emergency alert. Your contact may need assistance. (This is just a test - please ignore)")
+        # Send to every contact at once rather than one round trip after another
+        contact_results = await asyncio.gather(
+            *(send_sms(contact, contact_message) for contact in contacts),
+            return_exceptions=True,
+        )
+        for contact, contact_result in zip(contacts, contact_results):
             print(f"📋 Result for {contact}: {contact_result}")
     else:
         print(f"\n⚠️ No emergency contacts found, skipping emergency contact SMS test")
@@ -67,4 +74,4 @@ def main():
     print(f"\n✅ Emergency function tests completed!")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
@@ -4,8 +4,18 @@ Simple test script for the Crisis Classification API
 """
 
 import json
-import requests
-import time
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+
+# Concurrent requests in flight; also the throttle on the API
+MAX_WORKERS = 8
+
+def _post_tweet(client, api_endpoint, tweet_data):
+    """POST one test tweet, returning the response or the exception raised"""
+    try:
+        return client.post(api_endpoint, json=tweet_data)
+    except Exception as e:
+        return e
 
 def test_api(base_url="http://localhost:3000"):
     """
@@ -30,45 +40,46 @@ def test_api(base_url="http://localhost:3000"):
     print(f"🧪 Testing Crisis Classification API at: {api_endpoint}")
     print(f"📝 Found {len(test_tweets)} test tweets\n")
     
-    for i, tweet_data in enumerate(test_tweets, 1):
-        print(f"🔍 Test {i}/{len(test_tweets)}")
-        print(f"Tweet: {tweet_data['tweet_text'][:60]}...")
-        print(f"Image: {tweet_data['image_url']}")
-        
-        try:
-            # Make API request
-            response = requests.post(
-                api_endpoint,
-                json=tweet_data,
-                timeout=30,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                print("✅ Success!")
-                print(f"   Disaster Type: {result.get('disaster_type')}")
-                print(f"   Informative: {result.get('informativeness')}")
-                print(f"   Categories: {', '.join(result.get('humanitarian_categories', []))}")
-                print(f"   Location: {result.get('location')}")
-                print(f"   Damage: {result.get('damage_severity')}")
-                print(f"   Seriousness: {result.get('seriousness_score')}")
+    # One HTTP/2 client (gzip responses by default) shared by MAX_WORKERS threads;
+    # over HTTPS all requests multiplex on a single connection
+    client = httpx.Client(
+        http2=True,
+        timeout=30,
+        limits=httpx.Limits(max_connections=MAX_WORKERS),
+    )
+
+    with client, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        responses = executor.map(lambda tweet_data: _post_tweet(client, api_endpoint, tweet_data), test_tweets)
+
+        # Report in test order as responses complete
+        for i, (tweet_data, response) in enumerate(zip(test_tweets, responses), 1):
+            print(f"🔍 Test {i}/{len(test_tweets)}")
+            print(f"Tweet: {tweet_data['tweet_text'][:60]}...")
+            print(f"Image: {tweet_data['image_url']}")
+
+            if isinstance(response, httpx.ConnectError):
+                print("❌ Connection failed - is the server running?")
+            elif isinstance(response, httpx.TimeoutException):
+                print("❌ Request timed out")
+            elif isinstance(response, Exception):
+                print(f"❌ Error: {response}")
+            elif response.status_code == 200:
+                try:
+                    result = response.json()
+                    print("✅ Success!")
+                    print(f"   Disaster Type: {result.get('disaster_type')}")
+                    print(f"   Informative: {result.get('informativeness')}")
+                    print(f"   Categories: {', '.join(result.get('humanitarian_categories', []))}")
+                    print(f"   Location: {result.get('location')}")
+                    print(f"   Damage: {result.get('damage_severity')}")
+                    print(f"   Seriousness: {result.get('seriousness_score')}")
+                except Exception as e:
+                    print(f"❌ Error: {e}")
             else:
                 print(f"❌ Failed with status {response.status_code}")
                 print(f"   Error: {response.text}")
-                
-        except requests.exceptions.ConnectionError:
-            print("❌ Connection failed - is the server running?")
-        except requests.exceptions.Timeout:
-            print("❌ Request timed out")
-        except Exception as e:
-            print(f"❌ Error: {e}")
-        
-        print("-" * 50)
-        
-        # Small delay between requests
-        if i < len(test_tweets):
-            time.sleep(1)
+
+            print("-" * 50)
     
     print("🏁 Testing completed!")
 